@@ -0,0 +1,161 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from seafood_menu import analytics
+from seafood_menu import font_assets
+from seafood_menu import menu_image
+from seafood_menu import price_parser
+from seafood_menu import sheet_mirror
+from seafood_menu.menu_layout import LayoutOptions
+from seafood_menu.price_matrix import PriceMatrix
+
+from .synthetic import make_grid, price_strings
+
+# --- 效能基準 ---
+# 以合成試算表量測解析、分析與繪圖的熱點，結果存成 JSON 以便跨 commit 比較：
+#
+#   python -m benchmarks.run --out bench.json
+#   python -m benchmarks.run --quick --compare bench.json
+#
+# 每項取多次執行的最小值與中位數 (毫秒)；最小值受雜訊影響最小，比較時以它為準。
+
+FULL = {"items": 300, "specs": 3, "weeks": 156, "catalogue": (20, 100, 300), "repeat": 5}
+QUICK = {"items": 60, "specs": 3, "weeks": 52, "catalogue": (20, 60), "repeat": 3}
+
+
+def measure(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "repeat": repeat,
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+    }
+
+
+def bench_sheet(grid, repeat):
+    yield "dataframe.build", lambda: sheet_mirror.build_dataframe(grid), None
+
+
+def bench_parse(grid, repeat):
+    values = price_strings(grid)
+    n_rows = len(grid) - 1
+    columns = [values[i:i + n_rows] for i in range(0, len(values), n_rows)]
+    cold = price_parser._parse.cache_clear
+
+    yield "parse.clean_price.cold", lambda: [price_parser.clean_price(v) for v in values], cold
+    yield "parse.clean_price.warm", lambda: [price_parser.clean_price(v) for v in values], None
+    yield "parse.price_values.cold", lambda: [price_parser.price_values(c) for c in columns], cold
+    yield "parse.price_values.warm", lambda: [price_parser.price_values(c) for c in columns], None
+    yield "parse.parse_column.warm", lambda: [price_parser.parse_column(c) for c in columns], None
+
+
+def bench_analytics(grid, repeat):
+    matrix = PriceMatrix.from_grid(grid)
+    pairs = list(dict.fromkeys(zip(matrix.item, matrix.spec)))[:100]
+    history = analytics.PriceHistory(matrix)
+
+    yield "matrix.from_grid", lambda: PriceMatrix.from_grid(grid), None
+    yield "analytics.price_history", lambda: analytics.PriceHistory(matrix), None
+    yield "analytics.chart_data.100_items", lambda: [history.for_item(i, s) for i, s in pairs], None
+    yield "analytics.build_portfolio", lambda: analytics.build_portfolio(matrix), None
+
+
+def bench_render(config, repeat):
+    for n_items in config["catalogue"]:
+        grid = make_grid(items=n_items, specs=config["specs"], weeks=4, seed=n_items)
+        _, df = sheet_mirror.build_dataframe(grid)
+        plot_df = analytics.plot_frame(df, analytics.date_columns(df)[-1])
+        date_str = analytics.date_columns(df)[-1]
+        options = LayoutOptions(columns=2)
+        pages = menu_image.render_pages(plot_df, date_str, options=options)
+
+        yield (f"render.create_image.{n_items}_items",
+               lambda: menu_image.render_pages(plot_df, date_str, options=options), None)
+        yield f"encode.png.{n_items}_items", lambda: menu_image.export_pages(pages, "PNG"), None
+        yield f"encode.jpeg.{n_items}_items", lambda: menu_image.export_pages(pages, "JPEG", 90), None
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(config, only=None):
+    grid = make_grid(items=config["items"], specs=config["specs"], weeks=config["weeks"])
+    repeat = config["repeat"]
+    suites = (bench_sheet(grid, repeat), bench_parse(grid, repeat), bench_analytics(grid, repeat),
+              bench_render(config, repeat))
+    results = {}
+    for suite in suites:
+        for name, fn, setup in suite:
+            if only and not any(key in name for key in only):
+                continue
+            results[name] = measure(fn, repeat, setup)
+            print(f"{results[name]['min_ms']:10.1f} ms  {name}", file=sys.stderr)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "font": font_assets.find_font(),
+            "fonttools": font_assets.ft_subset is not None,
+            "shape": {"rows": len(grid) - 1, "cols": len(grid[0])},
+            "memory": PriceMatrix.from_grid(grid).memory(),
+            "config": {k: list(v) if isinstance(v, tuple) else v for k, v in config.items()},
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline):
+    print(f"\n{'項目':<40}{'基準':>10}{'目前':>10}{'比例':>8}")
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            continue
+        ratio = result["min_ms"] / old["min_ms"] if old["min_ms"] else float("nan")
+        flag = "  ⚠️" if ratio > 1.10 else ""
+        print(f"{name:<40}{old['min_ms']:>10.1f}{result['min_ms']:>10.1f}{ratio:>7.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="解析、分析與繪圖熱點的效能基準")
+    parser.add_argument("--quick", action="store_true", help="較小的資料量，適合開發時快速確認")
+    parser.add_argument("--only", nargs="+", help="只跑名稱包含這些字的項目，例如 parse render")
+    parser.add_argument("--out", help="結果存成 JSON")
+    parser.add_argument("--compare", help="與先前的 JSON 結果比較")
+    args = parser.parse_args(argv)
+
+    data = run(QUICK if args.quick else FULL, args.only)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(data, json.load(f))
+    if not args.out and not args.compare:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
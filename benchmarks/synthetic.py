@@ -0,0 +1,64 @@
+import datetime
+import random
+
+# --- 合成試算表 ---
+# 產生與正式試算表同樣形狀的 get_all_values() 資料：固定三欄 + 每週一組 (售價, 成本) 欄，
+# 價格字串刻意混入人工輸入常見的寫法，讓解析的成本接近實際情況。
+
+FISH = ["石斑", "鱸魚", "白鯧", "黃魚", "午仔", "虱目魚", "鮭魚", "鯛魚", "白帶魚", "透抽",
+        "草蝦", "白蝦", "沙蝦", "龍蝦", "花蟹", "沙公", "處女蟳", "干貝", "文蛤", "海瓜子"]
+SPECS = ["大", "中", "小", "特大", "活", "凍", "半斤裝", "一斤裝"]
+SERVICES = ["", "", "", "可代客清肚去鱗", "可代客切塊", "可代客蒸煮 (+$50)"]
+
+
+def messy_price(rng, base):
+    value = int(base * rng.uniform(0.85, 1.2))
+    roll = rng.random()
+    if roll < 0.35:
+        return str(value)
+    if roll < 0.50:
+        return f"${value:,}/斤"
+    if roll < 0.60:
+        return f"{value}元"
+    if roll < 0.68:
+        return f"{value}-{value + rng.choice((50, 100, 200))}"
+    if roll < 0.74:
+        return f"${value:,}"
+    if roll < 0.78:
+        return rng.choice(("售完", "時價", "缺貨"))
+    if roll < 0.82:
+        return f"{value}/隻"
+    return ""
+
+
+def make_grid(items=200, specs=3, weeks=156, seed=0, duplicate_headers=2):
+    # 回傳 list[list[str]]，第一列為標題；duplicate_headers 個日期會重複出現 (測試標題去重)
+    rng = random.Random(seed)
+    start = datetime.date(2023, 1, 6)
+    dates = [(start + datetime.timedelta(weeks=i)).strftime("%Y/%m/%d") for i in range(weeks)]
+    for i in range(min(duplicate_headers, weeks)):
+        dates[-(i + 1)] = dates[-(i + 2)]
+
+    header = ["品項名稱", "規格", "代工資訊"]
+    for d in dates:
+        header += [d, f"{d}_成本"]
+    grid = [header]
+    for i in range(items):
+        name = f"{FISH[i % len(FISH)]}{i // len(FISH) or ''}"
+        if rng.random() < 0.03:
+            name += " [停售]"
+        service = rng.choice(SERVICES)
+        for s in range(specs):
+            base = rng.randint(80, 2500)
+            row = [name, SPECS[s % len(SPECS)], service if s == 0 else ""]
+            for _ in dates:
+                price = messy_price(rng, base)
+                cost = messy_price(rng, base * 0.65) if price else ""
+                row += [price, cost]
+            grid.append(row)
+    return grid
+
+
+def price_strings(grid):
+    # 所有售價/成本欄的字串 (逐欄攤平)
+    return [row[c] for c in range(3, len(grid[0])) for row in grid[1:]]
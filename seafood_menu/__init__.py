@@ -0,0 +1,2 @@
+# 海鮮報價系統：價格解析、報價圖繪製、試算表存取與營運分析。
+# 刻意不在這裡匯入子模組，讓批次工具等只載入需要的部分 (gspread / oauth2client 於連線時才載入)。
@@ -0,0 +1,195 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from . import price_parser
+
+# --- 營運數據分析 ---
+# 快照裡的 PriceMatrix 已把售價/成本解析成 (規格列 × 日期) 的數值矩陣：
+# 單品看板直接切出一列，全品項毛利總覽則對整個矩陣一次向量化算完，都不必再解析字串。
+
+FIXED_COLS = ['品項名稱', '規格', '代工資訊', 'sheet_row']
+COST_SUFFIX = "_成本"
+HIDDEN_MARKERS = ("[停售]", "[隱藏]")
+
+
+def is_date_label(name):
+    return name not in FIXED_COLS and COST_SUFFIX not in name and "Unnamed" not in name and name != ""
+
+
+def date_columns(df):
+    return [c for c in df.columns if is_date_label(c)]
+
+
+def is_hidden(names):
+    # 名稱含 [停售]/[隱藏] 的品項不出現在表單與報價圖
+    names = pd.Series(names).astype(str)
+    hidden = pd.Series(False, index=names.index)
+    for marker in HIDDEN_MARKERS:
+        hidden |= names.str.contains(marker, regex=False)
+    return hidden
+
+
+def plot_frame(df, price_col):
+    # 某個日期欄的報價圖資料：未隱藏且售價非空白的規格列，欄位同發布時的 plot_df
+    prices = df[price_col].where(df[price_col].notna(), "").astype(str)
+    keep = (~is_hidden(df['品項名稱']) & (prices.str.strip() != "")).to_numpy()
+    return pd.DataFrame({
+        '品項名稱': df['品項名稱'].to_numpy()[keep],
+        '規格': df['規格'].to_numpy()[keep],
+        '代工資訊': df['代工資訊'].to_numpy()[keep],
+        '本週價格': prices.to_numpy()[keep],
+    })
+
+
+def date_order(dates):
+    # 依日期排序的索引 (重複標題的 _1、_2 視為同一天)，無法解析的放最後
+    labels = pd.Series(dates, dtype=object).str.replace(r"_\d+$", "", regex=True)
+    return np.argsort(pd.to_datetime(labels, errors="coerce").to_numpy(), kind="mergesort")
+
+
+def _values(matrix):
+    # float32 → float64 並去掉 float32 的尾數誤差 (價格最多到小數兩位)
+    return matrix.astype(np.float64).round(2)
+
+
+class PriceHistory:
+    # 直接從快照的價格矩陣切出單一品項規格的歷史，不必先展開成 (列 × 日期) 的長表
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self._first_row = {}
+        for i, key in enumerate(zip(matrix.item, matrix.spec)):
+            self._first_row.setdefault(key, i)
+        self._order = date_order(matrix.dates)
+        self._dates = np.array(matrix.dates, dtype=object)[self._order]
+
+    def nbytes(self):
+        # 只算自己的索引；共用的價格矩陣已計入快照本身
+        return int(self._order.nbytes + self._dates.nbytes + sys.getsizeof(self._first_row))
+
+    def for_item(self, item, spec):
+        # 回傳看板用的 chart_df；查無此品項規格時回傳 None，沒有任何數據時回傳空表
+        i = self._first_row.get((item, spec))
+        if i is None:
+            return None
+        order = self._order
+        price = np.nan_to_num(_values(self.matrix.price[i, order]))
+        cost = np.nan_to_num(_values(self.matrix.cost[i, order]))
+        keep = (price > 0) | (cost > 0)
+        price_raw = self.matrix.raw_row("price", i)[order][keep]
+        cost_raw = self.matrix.raw_row("cost", i)[order][keep]
+        price, cost = price[keep], cost[keep]
+        margin = price - cost
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margin_pct = np.where(price > 0, np.round(margin / np.where(price > 0, price, 1) * 100, 1), 0.0)
+        return pd.DataFrame({
+            "日期": self._dates[keep],
+            "原始售價(Text)": price_raw,
+            "單位": [price_parser.parse_price(r).unit for r in price_raw],
+            "售價": price,
+            "原始成本(Text)": cost_raw,
+            "成本": cost,
+            "毛利$": margin,
+            "毛利率%": margin_pct,
+        })
+
+
+def get_history(snapshot):
+    return snapshot.derive("history", lambda snap: PriceHistory(snap.matrix))
+
+
+# --- 全品項毛利總覽 ---
+VOLATILITY_WEEKS = 12
+SQUEEZE_THRESHOLD = -5.0  # 毛利率比上週少超過 5 個百分點就列入警示
+
+
+def _last_index(valid):
+    # 每列最後一個有效欄的索引；整列都沒有時為 -1
+    idx = np.where(valid, np.arange(valid.shape[1]), -1)
+    return idx.max(axis=1) if valid.shape[1] else np.full(valid.shape[0], -1)
+
+
+def _take(matrix, idx):
+    # 依每列的欄索引取值，索引為 -1 時回傳 NaN
+    out = np.full(matrix.shape[0], np.nan)
+    ok = idx >= 0
+    out[ok] = matrix[np.nonzero(ok)[0], idx[ok]]
+    return out
+
+
+def _pct(numer, denom):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denom > 0, np.round(numer / np.where(denom > 0, denom, 1) * 100, 1), np.nan)
+
+
+def build_portfolio(matrix):
+    # 每個規格列一筆：最新售價/成本、毛利、毛利率與上週比較、成本週變動、近 VOLATILITY_WEEKS 週成本波動
+    order = date_order(matrix.dates)
+    dates = [matrix.dates[i] for i in order]
+    n, d = matrix.n_rows, len(dates)
+
+    price = _values(matrix.price[:, order])
+    cost = _values(matrix.cost[:, order])
+    price[price <= 0] = np.nan
+    cost[cost <= 0] = np.nan
+    has_price, has_cost = ~np.isnan(price), ~np.isnan(cost)
+
+    last_p = _last_index(has_price)
+    last_c = _last_index(has_cost)
+    prev_c = _last_index(has_cost & (np.arange(d) != last_c[:, None]))
+    latest_price = _take(price, last_p)
+    latest_cost = _take(cost, last_c)
+    prev_cost = _take(cost, prev_c)
+
+    # 本週 (最後一個日期欄) 與上週的毛利率，各自以當時最近一次的售價/成本計算
+    def margin_pct_at(col):
+        p = _take(price, _last_index(has_price[:, :col + 1]))
+        c = _take(cost, _last_index(has_cost[:, :col + 1]))
+        return _pct(p - c, p)
+
+    now_pct = margin_pct_at(d - 1) if d else np.full(n, np.nan)
+    prev_pct = margin_pct_at(d - 2) if d > 1 else np.full(n, np.nan)
+    active = has_price[:, -1] & has_cost[:, -1] if d else np.zeros(n, dtype=bool)
+
+    recent = cost[:, -VOLATILITY_WEEKS:]
+    counts = (~np.isnan(recent)).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sums = np.nansum(recent, axis=1)
+        mean = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        var = np.nansum((recent - mean[:, None]) ** 2, axis=1) / np.maximum(counts, 1)
+    volatility = np.where(counts >= 2, _pct(np.sqrt(var), mean), np.nan)
+
+    date_arr = np.array(dates + [""], dtype=object)
+    table = pd.DataFrame({
+        "item": matrix.item,
+        "spec": matrix.spec,
+        "sheet_row": matrix.sheet_row,
+        "hidden": is_hidden(pd.Series(matrix.item)).to_numpy(),
+        "price_date": date_arr[last_p],
+        "price": latest_price,
+        "cost_date": date_arr[last_c],
+        "cost": latest_cost,
+        "margin": latest_price - latest_cost,
+        "margin_pct": _pct(latest_price - latest_cost, latest_price),
+        "active": active,
+        "margin_pct_now": now_pct,
+        "margin_pct_prev": prev_pct,
+        "margin_change": np.round(now_pct - prev_pct, 1),
+        "cost_change_pct": _pct(latest_cost - prev_cost, prev_cost),
+        "volatility_pct": volatility,
+        "weeks": has_price.sum(axis=1),
+    })
+    table = table[(last_p >= 0) | (last_c >= 0)].reset_index(drop=True)
+    table.attrs["latest_date"] = dates[-1] if dates else ""
+    return table
+
+
+def margin_squeeze(portfolio, top=5, threshold=SQUEEZE_THRESHOLD):
+    # 本週有售價與成本、毛利率比上週下降超過門檻的規格，依降幅排序
+    rows = portfolio[portfolio["active"] & ~portfolio["hidden"] & (portfolio["margin_change"] <= threshold)]
+    return rows.sort_values("margin_change", kind="mergesort").head(top)
+
+
+def get_portfolio(snapshot):
+    return snapshot.derive("portfolio", lambda snap: build_portfolio(snap.matrix))
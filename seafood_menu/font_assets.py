@@ -0,0 +1,262 @@
+import argparse
+import hashlib
+import logging
+import os
+import string
+import sys
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# --- 字體供應 ---
+# 繪圖時一律只用本機的字體檔，不會連網：
+#   * 依序在 FONT_DIRS (可用環境變數 SEAFOOD_FONT_DIR 指定) 尋找 FONT_FILES
+#   * 有安裝 fontTools 時，依實際要畫的文字產生子集字體並快取在 SUBSET_DIR，
+#     幾百 KB 的子集比 16MB 的完整 Noto CJK 載入快得多，也省記憶體。
+#     建立子集要數秒，一律在背景執行緒做 (快照載入時 prewarm 整份品項清單)；
+#     繪圖時若還沒有涵蓋所需文字的子集就先用完整字體，畫出來的結果相同
+#   * 繪圖前可用 missing_glyphs() 檢查字體是否涵蓋所有文字
+# 字體檔請事先放進 fonts/，或執行一次 `python -m seafood_menu.font_assets --download`。
+
+try:
+    from fontTools import subset as ft_subset
+    from fontTools.ttLib import TTFont
+except ImportError:  # fontTools 為選用套件，沒有時使用完整字體、不做缺字檢查
+    ft_subset = None
+    TTFont = None
+
+logger = logging.getLogger(__name__)
+
+FONT_URL = "https://github.com/googlefonts/noto-cjk/raw/main/Sans/OTF/TraditionalChinese/NotoSansCJKtc-Bold.otf"
+FONT_FILES = ("NotoSansCJKtc-Bold.otf", "NotoSansTC-Bold.otf", "NotoSansTC-Bold.ttf", "NotoSansCJK-Bold.ttc")
+FONT_DIRS = ("fonts", ".", "/usr/share/fonts/opentype/noto", "/usr/share/fonts/noto-cjk")
+FONT_PATH = None  # 指定字體檔時優先使用 (例如測試或門市自備字體)
+SUBSET_DIR = ".cache/fonts"
+MAX_SUBSETS = 20
+# 子集一律包含的字元：ASCII 與常見的價格寫法，避免每次多一個數字或符號就重建
+BASE_TEXT = string.printable + "，。：；！？（）～／、元斤兩隻尾盒包份台售完缺貨時價"
+
+SUBSET_EXTS = (".otf", ".ttf")
+
+_subset_lock = threading.Lock()
+_builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="font-subset")
+
+
+def font_dirs():
+    extra = os.environ.get("SEAFOOD_FONT_DIR")
+    return ((extra,) if extra else ()) + FONT_DIRS
+
+
+def find_font():
+    # 回傳第一個找到的字體檔路徑；都沒有時回傳 None
+    if FONT_PATH and os.path.exists(FONT_PATH):
+        return FONT_PATH
+    for folder in font_dirs():
+        for name in FONT_FILES:
+            path = os.path.join(folder, name)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def font_identity():
+    path = find_font()
+    return f"{path}:{_mtime(path)}" if path else ""
+
+
+def download(dest=None):
+    # 明確下載字體 (設定環境或按下按鈕時才呼叫，繪圖流程不會用到)；失敗時拋出例外
+    dest = dest or os.path.join(FONT_DIRS[0], FONT_FILES[0])
+    folder = os.path.dirname(dest)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = dest + ".part"
+    urllib.request.urlretrieve(FONT_URL, tmp)
+    os.replace(tmp, dest)
+    return dest
+
+
+@lru_cache(maxsize=4)
+def _codepoints(path, mtime):
+    font = TTFont(path, fontNumber=0, lazy=True)
+    try:
+        return frozenset(font.getBestCmap() or {})
+    finally:
+        font.close()
+
+
+def _drawable(text):
+    return {ch for ch in text if not ch.isspace() and ch.isprintable()}
+
+
+def missing_glyphs(text, path=None):
+    # 回傳字體缺少的字 (排序後的字串)；沒有字體時回傳所有非 ASCII 字元，沒有 fontTools 時回傳 None (無法檢查)
+    path = path or find_font()
+    chars = _drawable(text)
+    if path is None:
+        return "".join(sorted(ch for ch in chars if not ch.isascii()))
+    if TTFont is None:
+        return None
+    try:
+        cmap = _codepoints(path, _mtime(path))
+    except Exception:
+        logger.warning("無法讀取字體 %s 的字元表", path, exc_info=True)
+        return None
+    return "".join(sorted(ch for ch in chars if ord(ch) not in cmap))
+
+
+def _prune():
+    try:
+        entries = [os.path.join(SUBSET_DIR, name) for name in os.listdir(SUBSET_DIR)]
+    except OSError:
+        return
+    entries = sorted((p for p in entries if p.endswith(SUBSET_EXTS)), key=_mtime, reverse=True)
+    for path in entries[MAX_SUBSETS:]:
+        for victim in (path, _chars_path(path)):
+            try:
+                os.remove(victim)
+            except OSError:
+                pass
+
+
+def _chars_path(dest):
+    return os.path.splitext(dest)[0] + ".chars"
+
+
+def _build_subset(source, chars, dest):
+    font = TTFont(source, fontNumber=0)
+    options = ft_subset.Options()
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    options.drop_tables += ["FFTM"]
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(unicodes=[ord(ch) for ch in chars])
+    subsetter.subset(font)
+    suffix = f"{os.getpid()}.{threading.get_ident()}.part"
+    # 先寫好字元清單再放字體檔：看得到字體檔就一定讀得到它涵蓋哪些字
+    with open(f"{dest}.{suffix}.chars", "w", encoding="utf-8") as f:
+        f.write(chars)
+    os.replace(f"{dest}.{suffix}.chars", _chars_path(dest))
+    font.save(f"{dest}.{suffix}")
+    font.close()
+    os.replace(f"{dest}.{suffix}", dest)
+
+
+def _subset_plan(text, path):
+    # (需要的字元, 子集檔路徑)；同一個字體檔的子集檔名以字體識別開頭，方便找出可用的現成子集
+    chars = "".join(sorted(_drawable(text) | _drawable(BASE_TEXT)))
+    font_key = hashlib.sha1(f"{path}:{_mtime(path)}".encode("utf-8")).hexdigest()[:8]
+    key = hashlib.sha1(chars.encode("utf-8")).hexdigest()[:16]
+    ext = ".ttf" if path.lower().endswith(".ttf") else ".otf"
+    return chars, os.path.join(SUBSET_DIR, f"{font_key}-{key}{ext}")
+
+
+@lru_cache(maxsize=64)
+def _subset_chars(chars_path):
+    # 子集建好後內容不變，字元清單可以一直快取
+    with open(chars_path, encoding="utf-8") as f:
+        return frozenset(f.read())
+
+
+def _covering(chars, dest):
+    # 找出涵蓋 chars 的現成子集 (同一個字體檔)，有多個時取檔案最小的；沒有時回傳 None
+    if os.path.exists(dest):
+        return dest
+    prefix = os.path.basename(dest).split("-", 1)[0] + "-"
+    needed = set(chars)
+    best = None
+    try:
+        names = os.listdir(SUBSET_DIR)
+    except OSError:
+        return None
+    for name in names:
+        if not (name.startswith(prefix) and name.endswith(SUBSET_EXTS)):
+            continue
+        candidate = os.path.join(SUBSET_DIR, name)
+        try:
+            if needed <= _subset_chars(_chars_path(candidate)):
+                size = os.path.getsize(candidate)
+                if best is None or size < best[0]:
+                    best = (size, candidate)
+        except OSError:
+            continue
+    return best[1] if best else None
+
+
+def ensure_subset(text, path=None):
+    # 建立 (或找到) 涵蓋 text 的子集字體並回傳路徑；沒有 fontTools 或建立失敗時回傳完整字體
+    # 會花上數秒，只在背景 (prewarm) 或批次輸出開始前呼叫
+    path = path or find_font()
+    if path is None or ft_subset is None:
+        return path
+    chars, dest = _subset_plan(text, path)
+    with _subset_lock:
+        found = _covering(chars, dest)
+        if found is None:
+            try:
+                os.makedirs(SUBSET_DIR, exist_ok=True)
+                _build_subset(path, chars, dest)
+            except Exception:
+                logger.warning("建立子集字體失敗，改用完整字體 %s", path, exc_info=True)
+                return path
+            _prune()
+            found = dest
+    return found
+
+
+def prewarm(text, path=None):
+    # 在背景建立子集字體 (例如快照載入時以整份品項清單呼叫)；回傳 Future，不需要建立時回傳 None
+    path = path or find_font()
+    if path is None or ft_subset is None:
+        return None
+    return _builder.submit(ensure_subset, text, path)
+
+
+def subset_for(text, path=None):
+    # 繪圖用：回傳涵蓋 text 的現成子集字體，還沒有時先用完整字體並在背景建立，
+    # 不會在繪圖流程 (持有繪圖鎖) 中同步建立子集。沒有字體時回傳 None
+    path = path or find_font()
+    if path is None or ft_subset is None:
+        return path
+    chars, dest = _subset_plan(text, path)
+    found = _covering(chars, dest)
+    if found is None:
+        prewarm(text, path)
+        return path
+    os.utime(found)  # 更新最後使用時間，供淘汰
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="檢查或準備報價圖使用的中文字體")
+    parser.add_argument("--download", action="store_true", help=f"下載 {FONT_FILES[0]} 到 {FONT_DIRS[0]}/")
+    parser.add_argument("--check", metavar="TEXT", help="檢查字體是否涵蓋這段文字")
+    args = parser.parse_args(argv)
+
+    if args.download and find_font() is None:
+        print(f"下載中：{FONT_URL}")
+        print(f"已存到 {download()}")
+    path = find_font()
+    print(f"字體：{path or '找不到 (搜尋 ' + ', '.join(font_dirs()) + ')'}")
+    print(f"fontTools：{'已安裝，會建立子集字體' if ft_subset else '未安裝，使用完整字體且不檢查缺字'}")
+    if args.check is not None:
+        missing = missing_glyphs(args.check, path)
+        if missing is None:
+            print("無法檢查缺字")
+        else:
+            print(f"缺字：{missing}" if missing else "全部涵蓋")
+            return 1 if missing else 0
+    return 0 if path else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from . import render_assets
+from .menu_image import ExportFile
+
+# --- 報價圖輸出快取 ---
+# 同樣的內容 (品項/規格/代工/售價 + 日期 + 背景/浮水印/字體 + 輸出設定) 產生的檔案一定相同，
+# 以內容雜湊為 key 存在磁碟上，重複發布時直接回傳 bytes，不必重畫與重新編碼。
+# 成本欄不會出現在圖上，所以不列入 key。每個 key 一個資料夾 (多頁時有多個檔案)，超過上限時依最後使用時間淘汰。
+
+CACHE_DIR = ".cache/images"
+MAX_ENTRIES = 200
+MAX_BYTES = 200 * 1024 * 1024
+RENDER_VERSION = "3"  # 版面或繪圖邏輯改變時要調整，讓舊圖失效
+
+_lock = threading.Lock()
+
+
+def make_key(plot_df, date_str, manual_upload=None, render_options=None):
+    cols = ['品項名稱', '規格', '代工資訊', '本週價格']
+    rows = [["" if v is None else str(v) for v in row] for row in plot_df[cols].itertuples(index=False)]
+    payload = {
+        "version": RENDER_VERSION,
+        "date": date_str,
+        "rows": rows,
+        "options": render_options or {},
+        "background": render_assets.background_identity(),
+        "watermark": render_assets.watermark_identity(manual_upload),
+        "font": render_assets.font_identity(),
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, key)
+
+
+def get(key):
+    # 回傳 [ExportFile, ...]；沒有快取時回傳 None
+    folder = _path(key)
+    try:
+        with open(os.path.join(folder, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        files = []
+        for entry in manifest:
+            with open(os.path.join(folder, entry["file"]), "rb") as f:
+                files.append(ExportFile(entry["name"], entry["mime"], f.read()))
+        os.utime(folder)  # 更新最後使用時間，供 LRU 淘汰
+    except (OSError, ValueError, KeyError):
+        return None
+    return files
+
+
+def put(key, files):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(tmp, exist_ok=True)
+    manifest = []
+    for i, export in enumerate(files):
+        filename = f"{i}.bin"
+        with open(os.path.join(tmp, filename), "wb") as f:
+            f.write(export.data)
+        manifest.append({"file": filename, "name": export.name, "mime": export.mime})
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    try:
+        os.replace(tmp, _path(key))
+    except OSError:
+        # 別的 session 已經寫好同一個 key
+        shutil.rmtree(tmp, ignore_errors=True)
+    prune()
+
+
+def _folder_size(folder):
+    return sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
+
+
+def prune(max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+    with _lock:
+        try:
+            entries = []
+            for entry in os.scandir(CACHE_DIR):
+                if entry.is_dir() and not entry.name.endswith(".tmp"):
+                    entries.append((entry.stat().st_mtime, _folder_size(entry.path), entry.path))
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        total = 0
+        for i, (_, size, path) in enumerate(entries):
+            total += size
+            if i >= max_entries or total > max_bytes:
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,191 @@
+import io
+import threading
+import time
+from typing import NamedTuple
+
+from PIL import Image, ImageDraw
+
+from . import font_assets
+from . import menu_layout
+from . import perf
+from . import render_assets
+from .menu_layout import HEADER_H, LayoutOptions
+
+# --- 報價圖繪製與輸出 ---
+
+c_bg_fallback = "#FDFCF5"
+c_header_bg = "#C19A6B"
+c_header_text = "#FFFFFF"
+c_item_title = "#5C4033"
+c_text = "#4A4A4A"
+c_price = "#333333"
+c_line = "#E0D6CC"
+c_note_bg = "#F2EBE5"
+c_note_text = "#8E7878"
+
+# 格式名稱 -> (Pillow 格式, 副檔名, MIME)
+EXPORT_FORMATS = {
+    "PNG": ("PNG", "png", "image/png"),
+    "JPEG": ("JPEG", "jpg", "image/jpeg"),
+    "WebP": ("WEBP", "webp", "image/webp"),
+    "PDF": ("PDF", "pdf", "application/pdf"),
+}
+
+# 字體物件在各執行緒間共用，繪製時序列化；編碼 (export_pages) 不受限
+_render_lock = threading.Lock()
+
+
+class ExportFile(NamedTuple):
+    name: str
+    mime: str
+    data: bytes
+
+
+# 每張圖固定會畫的文字 (子集字體與缺字檢查都要算進去)
+FIXED_TEXT = "本週最新時價報價日期：※ 價格波動，以現場為主●▶第 / 頁Generated by SmallOrange seafood bot"
+
+
+def menu_text(data_df, date_str):
+    # 報價圖上會出現的所有文字
+    cols = [data_df[c].dropna().astype(str) for c in ('品項名稱', '規格', '代工資訊', '本週價格') if c in data_df]
+    return FIXED_TEXT + date_str + "".join("".join(col) for col in cols)
+
+
+def catalog_text(matrix):
+    # 整份試算表的品項/規格/代工文字，快照載入時用來預先建立涵蓋所有品項的子集字體
+    names = (matrix.item, matrix.spec, matrix.service)
+    return FIXED_TEXT + "".join("".join(map(str, col.categories)) for col in names)
+
+
+def _load_fonts(path=None, scale=1.0):
+    # 標題列與頁尾隨頁寬固定；品項區塊的字體依版面的縮放比例調整
+    fonts = {
+        "header": render_assets.get_font(80, path),
+        "date": render_assets.get_font(40, path),
+        "footer": render_assets.get_font(30, path),
+    }
+    for role, size in menu_layout.FONT_SIZES.items():
+        fonts[role] = render_assets.get_font(max(1, int(size * scale)), path)
+    return fonts
+
+
+def render_page(page, plan, date_str, fonts, page_no=1, page_count=1, manual_upload=None, timings=None,
+                background=None, watermark=None):
+    # background / watermark 直接傳給 render_assets (見 get_background)；批次輸出各門市版本用
+    width = plan.options.width
+    margin = plan.options.margin
+    col_width = plan.options.col_width
+    height = int(page.height)
+
+    with perf.timed(timings, "background"):
+        img = render_assets.get_background(width, height, background)
+        is_custom_bg = img is not None
+        if img is None:
+            img = Image.new("RGB", (width, height), c_bg_fallback)
+
+    # ====== Logo 浮水印 (置於上方欄位正中間) ======
+    with perf.timed(timings, "watermark"):
+        try:
+            # 高度約佔標題高度的 70%，已縮放並套好透明度的版本由 render_assets 快取
+            wm = render_assets.get_watermark(int(HEADER_H * 0.7), manual_upload, watermark)
+        except Exception:
+            wm = None
+        if wm is not None:
+            # 水平置中，垂直在標題區塊內置中；在畫文字之前貼，這樣文字會浮在上面
+            x_pos = (width - wm.size[0]) // 2
+            y_pos = (HEADER_H - wm.size[1]) // 2
+            img.paste(wm, (x_pos, y_pos), wm)
+
+    draw_start = time.perf_counter()
+    draw = ImageDraw.Draw(img, "RGBA")
+    if is_custom_bg:
+        draw.rectangle([(0, 0), (width, HEADER_H)], fill=(193, 154, 107, 200))
+    else:
+        draw.rectangle([(0, 0), (width, HEADER_H)], fill=c_header_bg)
+
+    draw.text((margin, 50), "本週最新時價", fill=c_header_text, font=fonts["header"])
+    draw.text((margin, 170), f"報價日期：{date_str}", fill="#FFF8DC", font=fonts["date"])
+    draw.text((width - margin - 500, 180), "※ 價格波動，以現場為主", fill="#F0E68C", font=fonts["date"])
+
+    k = plan.scale
+    indent = menu_layout.INDENT * k
+    bottom = menu_layout.CONTENT_TOP
+    for block in page.blocks:
+        current_x = block.x
+        current_y = block.y
+        col_right_edge = current_x + col_width
+
+        draw.text((current_x, current_y), f"● {block.name}", fill=c_item_title, font=fonts["title"])
+        current_y += menu_layout.TITLE_H * k
+
+        for spec, price_display in block.rows:
+            draw.text((current_x + indent, current_y), spec, fill=c_text, font=fonts["spec"])
+            w_price = draw.textlength(price_display, font=fonts["price"])
+            draw.text((col_right_edge - w_price, current_y), price_display, fill=c_price, font=fonts["price"])
+
+            w_spec = draw.textlength(spec, font=fonts["spec"])
+            line_start = current_x + indent + w_spec + indent
+            line_end = col_right_edge - w_price - indent
+            if line_end > line_start:
+                draw.line([(line_start, current_y + 25 * k), (line_end, current_y + 25 * k)], fill=c_line, width=1)
+            current_y += menu_layout.ROW_H * k
+
+        if block.notes:
+            box_h = (menu_layout.NOTE_BOX_H + (len(block.notes) - 1) * menu_layout.NOTE_LINE_H) * k
+            draw.rectangle([(current_x, current_y + 5 * k), (col_right_edge, current_y + 5 * k + box_h)], fill=c_note_bg)
+            for i, line in enumerate(block.notes):
+                draw.text((current_x + indent, current_y + (10 + i * menu_layout.NOTE_LINE_H) * k), line,
+                          fill=c_note_text, font=fonts["note"])
+        bottom = max(bottom, block.y + block.height)
+
+    footer_y = bottom + 20
+    draw.line([(margin, footer_y), (width - margin, footer_y)], fill=c_line, width=2)
+    draw.text((margin, footer_y + 30), "Generated by SmallOrange seafood bot", fill="#CCCCCC", font=fonts["footer"])
+    if page_count > 1:
+        label = f"第 {page_no} / {page_count} 頁"
+        w_label = draw.textlength(label, font=fonts["footer"])
+        draw.text((width - margin - w_label, footer_y + 30), label, fill="#CCCCCC", font=fonts["footer"])
+    perf.record(timings, "draw", draw_start)
+    return img
+
+
+def render_pages(data_df, date_str, manual_upload=None, options=None, timings=None, background=None, watermark=None):
+    with _render_lock:
+        return _render_pages(data_df, date_str, manual_upload, options, timings, background, watermark)
+
+
+def _render_pages(data_df, date_str, manual_upload, options, timings, background, watermark):
+    with perf.timed(timings, "font"):
+        path = font_assets.subset_for(menu_text(data_df, date_str))
+        base = _load_fonts(path)
+    with perf.timed(timings, "layout"):
+        plan = menu_layout.plan_layout(data_df, options, lambda text, role: base[role].getlength(text))
+    with perf.timed(timings, "font"):
+        fonts = _load_fonts(path, plan.scale) if plan.scale < 1 else base
+    count = len(plan.pages)
+    return [render_page(page, plan, date_str, fonts, i + 1, count, manual_upload, timings, background, watermark)
+            for i, page in enumerate(plan.pages)]
+
+
+def create_image(data_df, date_str, manual_upload=None, timings=None, columns=2):
+    # 單張不分頁的報價圖
+    options = LayoutOptions(columns=columns)
+    return render_pages(data_df, date_str, manual_upload, options, timings)[0]
+
+
+def export_pages(pages, fmt="PNG", quality=90, basename="menu", timings=None):
+    pil_format, ext, mime = EXPORT_FORMATS[fmt]
+    files = []
+    with perf.timed(timings, "encode"):
+        if pil_format == "PDF":
+            buf = io.BytesIO()
+            pages[0].save(buf, format="PDF", save_all=True, append_images=pages[1:], resolution=150)
+            files.append(ExportFile(f"{basename}.pdf", mime, buf.getvalue()))
+        else:
+            params = {"quality": int(quality)} if pil_format in ("JPEG", "WEBP") else {}
+            for i, page in enumerate(pages):
+                buf = io.BytesIO()
+                page.save(buf, format=pil_format, **params)
+                suffix = f"_{i + 1}" if len(pages) > 1 else ""
+                files.append(ExportFile(f"{basename}{suffix}.{ext}", mime, buf.getvalue()))
+    return files
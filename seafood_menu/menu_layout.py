@@ -0,0 +1,142 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+import pandas as pd
+
+from . import price_parser
+
+# --- 報價圖版面配置 ---
+# 先量測每個品項區塊的實際高度 (有無代工資訊也算進去)，依序放進目前最短的欄，
+# 超過單頁最大高度就換頁。產生的 LayoutPlan 直接交給 menu_image 繪製，兩邊不再各算一次。
+# 有提供 measure (量文字寬度) 時也量寬度：欄太窄時整份報價的品項字體等比例縮小，
+# 讓最寬的品項名稱與「規格 … 價格」放得進一欄；代工資訊較長則依欄寬換行。
+
+HEADER_H = 280
+CONTENT_TOP = 330
+TITLE_H = 80
+ROW_H = 60
+SERVICE_H = 80
+ITEM_GAP = 50
+FOOTER_H = 100
+NOTE_BOX_H = 50      # 代工資訊底框 (單行) 的高度
+NOTE_LINE_H = 44     # 代工資訊每多一行增加的高度
+INDENT = 20          # 規格、代工資訊相對品項名稱的縮排
+MIN_GAP = 40         # 規格與價格之間至少留的距離
+# 品項區塊內文字的字體大小 (scale 為 1 時)
+FONT_SIZES = {"title": 60, "spec": 40, "price": 50, "note": 36}
+
+
+@dataclass
+class LayoutOptions:
+    width: int = 1600
+    columns: int = 2
+    max_height: Optional[int] = None  # 單頁最大高度 (px)，None 代表不分頁
+    margin: int = 60
+    col_gap: int = 100
+
+    @property
+    def col_width(self):
+        return (self.width - self.margin * 2 - self.col_gap * (self.columns - 1)) / self.columns
+
+
+@dataclass
+class Block:
+    name: str
+    rows: list      # [(規格, 顯示用價格)]
+    service: str
+    height: int
+    x: float = 0
+    y: int = 0
+    notes: list = field(default_factory=list)  # 代工資訊依欄寬換行後的各行
+
+
+@dataclass
+class Page:
+    blocks: list = field(default_factory=list)
+    height: int = CONTENT_TOP + FOOTER_H
+
+
+@dataclass
+class LayoutPlan:
+    options: LayoutOptions
+    pages: list
+    scale: float = 1.0  # 品項區塊的字體與間距縮放比例
+
+
+def block_scale(blocks, col_width, measure):
+    # 最寬的一行 (measure 以 scale 1 的字體量) 放得進欄寬所需的縮放比例，最大為 1
+    need = 0.0
+    for block in blocks:
+        need = max(need, measure(f"● {block.name}", "title"))
+        for spec, price in block.rows:
+            need = max(need, INDENT + measure(spec, "spec") + MIN_GAP + measure(price, "price"))
+    return min(1.0, col_width / need) if need > 0 else 1.0
+
+
+def wrap_text(text, width, measure, role):
+    # 依寬度逐字換行 (中文沒有空白可斷)；大多數放得下，先整段量一次
+    if measure(text, role) <= width:
+        return [text]
+    lines, line = [], ""
+    for ch in text:
+        if line and measure(line + ch, role) > width:
+            lines.append(line)
+            line = ch.lstrip()
+        else:
+            line += ch
+    return lines + [line] if line else lines
+
+
+def measure_blocks(data_df, col_width=None, measure=None):
+    # 回傳 (區塊, 縮放比例)；沒有 measure 時不量寬度，比例為 1、代工資訊不換行
+    blocks = []
+    for name, group in data_df.groupby('品項名稱', sort=False):
+        rows = [(str(spec), price_parser.format_display(str(price)))
+                for spec, price in zip(group['規格'], group['本週價格'])]
+        service_val = group['代工資訊'].iloc[0]
+        service = str(service_val) if pd.notna(service_val) else ""
+        if not service.strip():
+            service = ""
+        blocks.append(Block(str(name), rows, service, 0))
+
+    scale = block_scale(blocks, col_width, measure) if measure is not None and col_width else 1.0
+    for block in blocks:
+        if block.service:
+            text = f"▶ {block.service}"
+            if measure is not None and col_width:
+                scaled = lambda t, role: measure(t, role) * scale
+                block.notes = wrap_text(text, col_width - INDENT * 2 * scale, scaled, "note")
+            else:
+                block.notes = [text]
+        note_h = SERVICE_H + (len(block.notes) - 1) * NOTE_LINE_H if block.notes else 0
+        block.height = round((TITLE_H + len(block.rows) * ROW_H + note_h + ITEM_GAP) * scale)
+    return blocks, scale
+
+
+def plan_layout(data_df, options=None, measure=None):
+    # measure(text, role)：以 FONT_SIZES[role] 的字體量文字寬度 (px)
+    options = options or LayoutOptions()
+    n = max(1, int(options.columns))
+    limit = options.max_height - FOOTER_H if options.max_height else None
+    if measure is not None:
+        measure = lru_cache(maxsize=None)(measure)  # 規格、價格大量重複，每種字串只量一次
+    blocks, scale = measure_blocks(data_df, options.col_width, measure)
+
+    pages = []
+    placed = []
+    cursors = [CONTENT_TOP] * n
+    for block in blocks:
+        col = min(range(n), key=lambda c: cursors[c])  # 同高時放左邊
+        if limit is not None and placed and cursors[col] + block.height > limit:
+            # 最短的欄都放不下就換頁；單一區塊比整頁還高時獨佔一頁
+            pages.append(Page(placed, max(cursors) + FOOTER_H))
+            placed = []
+            cursors = [CONTENT_TOP] * n
+            col = 0
+        block.x = options.margin + col * (options.col_width + options.col_gap)
+        block.y = cursors[col]
+        cursors[col] += block.height
+        placed.append(block)
+    pages.append(Page(placed, max(cursors) + FOOTER_H))
+    return LayoutPlan(options, pages, scale)
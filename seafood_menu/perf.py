@@ -0,0 +1,128 @@
+import contextvars
+import datetime
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# --- 效能計時 ---
+# 以 dict 累計各階段耗時 (毫秒)；timings 傳 None 時不做任何事，呼叫端不必判斷。
+# 開啟效能面板時，每次重跑以 trace() 建立一份追蹤，熱點處的 span() 記進同一份；
+# 沒開啟時 span() 不做任何事。追蹤綁在執行重跑的執行緒 (contextvars)，
+# 背景執行緒 (發布寫入、繪圖、鏡像對帳) 不會誤記到別的重跑。
+
+PHASE_LABELS = {
+    "font": "字體",
+    "layout": "版面配置",
+    "background": "背景",
+    "watermark": "浮水印",
+    "draw": "繪製文字",
+    "encode": "編碼",
+}
+SPAN_LABELS = {
+    "sheet_auth": "試算表授權",
+    "sheet_open": "開啟工作表",
+    "fetch": "讀取試算表 (get_all_values / 增量)",
+    "mirror": "讀取本機鏡像",
+    "snapshot": "建立資料表",
+    "form": "表單輸入框",
+    "check": "發布前檢查",
+    "write": "寫入試算表",
+    "dashboard": "營運看板",
+    "portfolio": "毛利總覽",
+    "total": "整頁重跑",
+}
+
+
+@contextmanager
+def timed(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def record(timings, name, start):
+    # 給不方便包成 with 區塊的長段程式使用，start 為 time.perf_counter() 的值
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def format_timings(timings):
+    parts = [f"{PHASE_LABELS.get(k, k)} {v:.0f} ms" for k, v in timings.items()]
+    return " · ".join(parts) + f" (合計 {sum(timings.values()):.0f} ms)"
+
+
+# --- 每次重跑的追蹤 ---
+_current = contextvars.ContextVar("perf_trace", default=None)
+
+
+@dataclass
+class Trace:
+    started_at: str
+    spans: dict = field(default_factory=dict)   # 名稱 -> 毫秒
+    counts: dict = field(default_factory=dict)  # 名稱 -> 次數/數量 (例如寫入的請求數)
+
+    def to_dict(self):
+        return {"started_at": self.started_at, "spans": dict(self.spans), "counts": dict(self.counts)}
+
+
+@contextmanager
+def trace(enabled=True):
+    # 包住整次重跑；enabled 為 False 時 yield None，span() 全部不記錄
+    if not enabled:
+        yield None
+        return
+    current = Trace(datetime.datetime.now().isoformat(timespec="seconds"))
+    token = _current.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.spans["total"] = (time.perf_counter() - start) * 1000
+        _current.reset(token)
+
+
+def span(name):
+    current = _current.get()
+    return timed(current.spans if current is not None else None, name)
+
+
+def add(name, ms=None, count=None):
+    # 記錄在別處量好的時間 (例如背景執行緒的寫入與繪圖結果)
+    current = _current.get()
+    if current is None:
+        return
+    if ms is not None:
+        current.spans[name] = current.spans.get(name, 0.0) + ms
+    if count is not None:
+        current.counts[name] = current.counts.get(name, 0) + count
+
+
+def label(name):
+    # "render.draw" -> "報價圖：繪製文字"
+    if name.startswith("render."):
+        return "報價圖：" + PHASE_LABELS.get(name[len("render."):], name[len("render."):])
+    return SPAN_LABELS.get(name, name)
+
+
+def summarize(traces, last=None):
+    # 每個階段：最近一次、p50、p95 (毫秒) 與出現次數；只計入有該階段的重跑
+    names = list(dict.fromkeys(name for t in traces for name in t.spans))
+    rows = []
+    for name in names:
+        values = np.array([t.spans[name] for t in traces if name in t.spans])
+        rows.append({
+            "name": name,
+            "label": label(name),
+            "last_ms": last.spans.get(name, np.nan) if last is not None else values[-1],
+            "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)),
+            "runs": len(values),
+        })
+    table = pd.DataFrame(rows, columns=["name", "label", "last_ms", "p50_ms", "p95_ms", "runs"])
+    return table.sort_values("p95_ms", ascending=False, kind="mergesort").reset_index(drop=True)
@@ -0,0 +1,131 @@
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from . import analytics
+from . import price_parser
+
+# --- 發布前檢查 ---
+# 手滑把 1200 打成 12000、或忘了填成本，會直接寫進試算表與報價圖。發布前把輸入值與
+# 該規格近 HISTORY_WEEKS 次的歷史比較 (中位數 ± MAD，對偶爾的異常值不敏感)，
+# 並檢查毛利為負與缺成本；有問題時先列出來讓使用者確認或修改。
+# 歷史統計對整個價格矩陣一次向量化算完，並隨快照快取，每次發布只需查表。
+
+HISTORY_WEEKS = 12
+MIN_HISTORY = 3       # 歷史少於 3 次時不判斷異常值
+OUTLIER_SCORE = 5.0   # 偏離中位數超過 5 個 (常態化的) MAD 視為異常
+MAD_FLOOR = 0.05      # 歷史價格幾乎不變時 MAD 為 0，至少以中位數的 5% 當作尺度
+MAD_SCALE = 1.4826    # 常態分佈下 MAD 與標準差的比例
+
+ISSUE_LABELS = {
+    "price_outlier": "售價與歷史差異過大",
+    "cost_outlier": "成本與歷史差異過大",
+    "negative_margin": "售價低於成本",
+    "missing_cost": "有售價但未填成本",
+}
+
+
+@dataclass
+class HistoryStats:
+    sheet_row: np.ndarray   # 與下列陣列對齊的試算表列號
+    median: dict            # "price"/"cost" -> 每列的中位數 (沒有歷史為 NaN)
+    mad: dict               # "price"/"cost" -> 每列的 MAD
+    count: dict             # "price"/"cost" -> 每列納入統計的次數
+
+    def nbytes(self):
+        arrays = [self.sheet_row] + [a for d in (self.median, self.mad, self.count) for a in d.values()]
+        return int(sum(a.nbytes for a in arrays))
+
+    def rows(self, sheet_rows):
+        # 試算表列號 -> 統計陣列的索引；不存在的列為 -1
+        lookup = pd.Index(self.sheet_row)
+        return lookup.get_indexer(np.asarray(sheet_rows, dtype=np.int64))
+
+
+def _recent_stats(values, weeks):
+    # values：(列 × 日期，已依日期排序)，NaN 為沒有資料；每列只取最後 weeks 個有效值
+    valid = ~np.isnan(values)
+    from_end = np.cumsum(valid[:, ::-1], axis=1)[:, ::-1]
+    window = np.where(valid & (from_end <= weeks), values, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 整列沒有資料時 nanmedian 會警告
+        median = np.nanmedian(window, axis=1) if values.shape[1] else np.full(values.shape[0], np.nan)
+        mad = np.nanmedian(np.abs(window - median[:, None]), axis=1) if values.shape[1] else median.copy()
+    return median, mad, (~np.isnan(window)).sum(axis=1)
+
+
+def history_stats(matrix, before=None, weeks=HISTORY_WEEKS):
+    # before：只使用早於這個日期 (YYYY/MM/DD) 的欄，覆蓋既有日期時不會拿舊值跟自己比
+    order = analytics.date_order(matrix.dates)
+    if before is not None:
+        labels = pd.Series([matrix.dates[i] for i in order], dtype=object).str.replace(r"_\d+$", "", regex=True)
+        parsed = pd.to_datetime(labels, errors="coerce")
+        order = order[(parsed < pd.to_datetime(before, errors="coerce")).to_numpy()]
+    median, mad, count = {}, {}, {}
+    for kind, source in (("price", matrix.price), ("cost", matrix.cost)):
+        values = analytics._values(source[:, order])
+        values[values <= 0] = np.nan
+        median[kind], mad[kind], count[kind] = _recent_stats(values, weeks)
+    return HistoryStats(np.asarray(matrix.sheet_row), median, mad, count)
+
+
+def get_stats(snapshot, date_str):
+    return snapshot.derive(f"history_stats:{date_str}", lambda snap: history_stats(snap.matrix, before=date_str))
+
+
+def _score(value, median, mad):
+    scale = np.maximum(mad * MAD_SCALE, median * MAD_FLOOR)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.abs(value - median) / scale
+
+
+def check_updates(stats, updates):
+    # 回傳有問題的輸入 (每個問題一列)；沒有問題時為空表
+    columns = ["sheet_row", "item", "spec", "issue", "field", "entered", "reference", "deviation_pct", "history"]
+    if not updates:
+        return pd.DataFrame(columns=columns)
+    table = pd.DataFrame(updates)
+    idx = stats.rows(table["sheet_row"])
+    known = idx >= 0
+    safe = np.where(known, idx, 0)
+
+    price_text = table["price"].fillna("").astype(str).str.strip()
+    cost_text = table["cost"].fillna("").astype(str).str.strip()
+    price = price_parser.price_values(price_text.to_numpy())
+    cost = price_parser.price_values(cost_text.to_numpy())
+    sold_out = price_text.map(lambda p: price_parser.parse_price(p).sold_out).to_numpy(dtype=bool)
+    selling = (price > 0) & ~sold_out
+
+    found = []
+
+    def add(mask, issue, field, entered, reference, count):
+        # reference：異常值比較的是歷史中位數，毛利為負比較的是成本
+        for i in np.nonzero(mask)[0]:
+            dev = (entered[i] - reference[i]) / reference[i] * 100 if reference[i] > 0 else np.nan
+            found.append((int(table["sheet_row"].iat[i]), table["name"].iat[i], table["spec"].iat[i],
+                          issue, field, entered[i], reference[i], round(float(dev), 1), int(count[i])))
+
+    for kind, value in (("price", price), ("cost", cost)):
+        median = np.where(known, stats.median[kind][safe], np.nan)
+        mad = np.where(known, stats.mad[kind][safe], np.nan)
+        count = np.where(known, stats.count[kind][safe], 0)
+        score = _score(value, median, mad)
+        outlier = (value > 0) & (count >= MIN_HISTORY) & (score > OUTLIER_SCORE)
+        add(outlier, f"{kind}_outlier", kind, value, median, count)
+
+    cost_median = np.where(known, stats.median["cost"][safe], np.nan)
+    cost_count = np.where(known, stats.count["cost"][safe], 0)
+    add(selling & (cost > 0) & (price < cost), "negative_margin", "price", price, cost, cost_count)
+    # 只對以前填過成本的規格提醒，從沒記成本的品項不算漏填
+    add(selling & (cost_text == "").to_numpy() & (cost_count > 0), "missing_cost", "cost", cost, cost_median, cost_count)
+
+    issues = pd.DataFrame(found, columns=columns)
+    return issues.sort_values(["sheet_row", "issue"], kind="mergesort").reset_index(drop=True)
+
+
+def acknowledged(issues, reviewed):
+    # 目前的問題是否都已在先前的檢查中被確認過 (同一列、同一問題、同樣的輸入值)
+    keys = set(zip(issues["sheet_row"], issues["issue"], issues["entered"]))
+    return keys <= set(zip(reviewed["sheet_row"], reviewed["issue"], reviewed["entered"]))
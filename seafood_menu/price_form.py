@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from . import analytics
+
+# --- 價格輸入表單 ---
+# 品項很多時一次建立數百個輸入框會讓頁面 (尤其手機) 卡頓，這裡改為分頁：
+# 只有目前頁面的品項會建立輸入框，輸入的值透過 on_change 存進 session_state，
+# 換頁、搜尋、切換「只看已修改」都不會遺失；發布時再與上週值合併成完整的 updates。
+# 表單包在 st.fragment 裡：輸入、換頁、搜尋只重跑表單本身，按下發布才整頁重跑。
+
+PAGE_SIZES = [10, 20, 50, 100]
+EDITS_KEY = "price_edits"
+SUBMIT_KEY = "price_form_submitted"
+
+
+def build_entries(matrix):
+    # 每個快照只需建一次：可見的規格列 + 上週售價/成本，依品項首次出現的順序排列 (同 groupby(sort=False))
+    n, d = matrix.n_rows, len(matrix.dates)
+    visible = ~analytics.is_hidden(pd.Series(matrix.item)).to_numpy()
+    cost_dates = np.nonzero(matrix.cost_cols >= 0)[0]
+    last_price = matrix.raw_column("price", d - 1) if d else np.full(n, "", dtype=object)
+    last_cost = matrix.raw_column("cost", cost_dates[-1]) if len(cost_dates) else np.full(n, "", dtype=object)
+
+    entries = pd.DataFrame({
+        'sheet_row': matrix.sheet_row[visible],
+        'name': np.asarray(matrix.item, dtype=object)[visible],
+        'spec': np.asarray(matrix.spec, dtype=object)[visible],
+        'service': np.asarray(matrix.service, dtype=object)[visible],
+        'last_price': last_price[visible],
+        'last_cost': last_cost[visible],
+    })
+    entries['item_order'] = pd.factorize(entries['name'])[0]
+    return entries.sort_values('item_order', kind='mergesort').reset_index(drop=True)
+
+
+def _edits():
+    return st.session_state.setdefault(EDITS_KEY, {})
+
+
+def _remember(sheet_row, field, widget_key):
+    _edits().setdefault(sheet_row, {})[field] = st.session_state[widget_key]
+
+
+def current_values(entries):
+    # 回傳 (price, cost) 兩個 Series：有輸入過的用輸入值，否則用上週值
+    edits = _edits()
+    price = entries['last_price'].copy()
+    cost = entries['last_cost'].copy()
+    for i, sheet_row in enumerate(entries['sheet_row']):
+        edit = edits.get(int(sheet_row))
+        if edit:
+            price.iat[i] = edit.get('price', price.iat[i])
+            cost.iat[i] = edit.get('cost', cost.iat[i])
+    return price, cost
+
+
+def collect_updates(entries):
+    price, cost = current_values(entries)
+    return [
+        {'sheet_row': int(r), 'name': n, 'spec': s, 'service': sv, 'price': p, 'cost': c}
+        for r, n, s, sv, p, c in zip(entries['sheet_row'], entries['name'], entries['spec'],
+                                     entries['service'], price, cost)
+    ]
+
+
+def render(entries, date_str):
+    # 畫出目前頁面的輸入框；回傳 (是否按下發布, updates)
+    st.subheader(f"📝 輸入價格與成本 ({date_str})")
+    st.caption("💡 提示：若本週暫停供應，請將「售價」留白，即可在報價圖片中自動隱藏。若要長期下架，請在 Sheet 上的名稱加入 [停售]。")
+
+    price, cost = current_values(entries)
+    changed = (price != entries['last_price']) | (cost != entries['last_cost'])
+
+    f1, f2, f3 = st.columns([3, 1, 1])
+    with f1:
+        keyword = st.text_input("🔍 搜尋品項名稱", key="form_search", placeholder="輸入關鍵字篩選")
+    with f2:
+        changed_only = st.toggle("只看已修改", key="form_changed_only")
+    with f3:
+        page_size = st.selectbox("每頁品項數", PAGE_SIZES, index=1, key="form_page_size")
+
+    mask = pd.Series(True, index=entries.index)
+    if keyword.strip():
+        mask &= entries['name'].astype(str).str.contains(keyword.strip(), case=False, regex=False)
+    if changed_only:
+        mask &= changed
+    visible = entries[mask]
+
+    items = list(dict.fromkeys(visible['name']))
+    pages = max(1, -(-len(items) // page_size))
+    page = st.number_input(f"頁數 (共 {pages} 頁 / {len(items)} 個品項)", 1, pages, 1, key="form_page") if pages > 1 else 1
+    page_items = set(items[(page - 1) * page_size: page * page_size])
+
+    for _, group in visible[visible['name'].isin(page_items)].groupby('item_order', sort=True):
+        st.markdown(f"#### 🐟 {group['name'].iat[0]}")
+        for row in group.itertuples(index=False):
+            sheet_row = int(row.sheet_row)
+            edit = _edits().get(sheet_row, {})
+            p_key, c_key = f"p_{sheet_row}", f"c_{sheet_row}"
+            c1, c2, c3 = st.columns([2, 2, 2])
+            with c1:
+                st.text_input(f"{row.spec} 售價", value=edit.get('price', row.last_price), key=p_key,
+                              placeholder="售價留空即隱藏", on_change=_remember, args=(sheet_row, 'price', p_key))
+            with c2:
+                st.text_input("成本", value=edit.get('cost', row.last_cost), key=c_key,
+                              placeholder="成本", on_change=_remember, args=(sheet_row, 'cost', c_key))
+            with c3:
+                st.markdown(f"<small style='color:gray'>上週售價: {row.last_price}<br>上週成本: {row.last_cost}</small>", unsafe_allow_html=True)
+        st.divider()
+
+    st.caption(f"共 {entries['name'].nunique()} 個品項 / {len(entries)} 個規格，已修改 {int(changed.sum())} 筆")
+    submitted = st.button("🚀 確認發布", type="primary")
+    return submitted, (collect_updates(entries) if submitted else [])
+
+
+@st.fragment
+def render_fragment(entries, date_str):
+    # 按下發布時記下旗標並整頁重跑，由 take_submission() 在整頁重跑時取出
+    submitted, _ = render(entries, date_str)
+    if submitted:
+        st.session_state[SUBMIT_KEY] = True
+        st.rerun(scope="app")
+
+
+def take_submission(entries):
+    # 回傳 (是否按下發布, updates)；旗標只用一次
+    if st.session_state.pop(SUBMIT_KEY, False):
+        return True, collect_updates(entries)
+    return False, []
@@ -0,0 +1,233 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from . import analytics
+from . import price_parser
+from .sheet_mirror import dedup_headers
+
+# --- 精簡的價格表表示法 ---
+# get_all_values() 的二維字串陣列加上同內容的 object DataFrame，每格都是獨立的 Python 字串，
+# 幾年的週資料下來佔用數十 MB。這裡改存：
+#   * 品項/規格/代工資訊：Categorical (重複的名稱只存一份)
+#   * 售價/成本：float32 矩陣 (列 × 日期)，空白為 NaN；售價另有售完遮罩
+#   * 原始字串：只保留「無法由數值還原」的格子 (例如 "$1,200/斤"、"售完")，其餘由數值格式化回來
+# 快照在所有 session 間共用，陣列一律設為唯讀。
+
+FIXED_FIELDS = {'品項名稱': 'item', '規格': 'spec', '代工資訊': 'service'}
+_PTR = 8  # 每個 Python 物件參照的大小 (list / object 陣列)
+
+
+def _canonical(value):
+    # 數值對應的標準字串；原始字串與它相同時不必保留原字串
+    if np.isnan(value):
+        return ""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _readonly(*arrays):
+    for arr in arrays:
+        arr.flags.writeable = False
+
+
+def _categorical(values):
+    return pd.Categorical(np.asarray(values, dtype=object))
+
+
+def _categorical_bytes(cat):
+    return int(cat.codes.nbytes + sum(sys.getsizeof(c) for c in cat.categories))
+
+
+class PriceMatrix:
+    def __init__(self, header_row, n_rows):
+        self.header_row = list(header_row)              # 第一列原樣 (未 strip)
+        self.raw_headers = [h.strip() for h in header_row]
+        self.headers = dedup_headers(self.raw_headers)  # 去重後的標題 (同 DataFrame 欄名)
+        self.n_rows = n_rows
+        self.sheet_row = np.arange(2, n_rows + 2, dtype=np.int32)
+        self.fixed = {}       # item/spec/service -> Categorical
+        self.extra = {}       # 其他欄 (0-based 欄索引) -> Categorical
+        self.dates = []       # 售價欄的標題 (去重後)，依試算表順序
+        self.price_cols = np.empty(0, dtype=np.int32)
+        self.cost_cols = np.empty(0, dtype=np.int32)  # 沒有成本欄時為 -1
+        self.price = np.empty((n_rows, 0), dtype=np.float32)
+        self.cost = np.empty((n_rows, 0), dtype=np.float32)
+        self.sold_out = np.empty((n_rows, 0), dtype=bool)
+        self._raw = {}        # "price"/"cost" -> (扁平索引, 字串代碼)
+        self._raw_strings = np.empty(0, dtype=object)
+        self._columns = {}    # 0-based 欄索引 -> (種類, 索引)
+        self.source_bytes = 0  # 以 list + object DataFrame 保存時的估計大小
+
+    # --- 建立 ---
+    @classmethod
+    def from_grid(cls, data):
+        header = data[0] if data else []
+        width = len(header)
+        body = data[1:]
+        m = cls(header, len(body))
+        grid = np.empty((len(body), width), dtype=object)
+        for i, row in enumerate(body):
+            grid[i, :len(row)] = row[:width]
+        if width:
+            grid[pd.isna(grid)] = ""
+
+        kinds = {}
+        for c, name in enumerate(m.headers):
+            if name in FIXED_FIELDS and FIXED_FIELDS[name] not in m.fixed:
+                m.fixed[FIXED_FIELDS[name]] = _categorical(grid[:, c])
+                kinds[c] = ("fixed", FIXED_FIELDS[name])
+        for field in FIXED_FIELDS.values():
+            m.fixed.setdefault(field, _categorical(np.full(len(body), "", dtype=object)))
+
+        date_cols = [c for c, name in enumerate(m.headers) if c not in kinds and analytics.is_date_label(name)]
+        index = {name: c for c, name in enumerate(m.headers)}
+        m.dates = [m.headers[c] for c in date_cols]
+        m.price_cols = np.array(date_cols, dtype=np.int32)
+        m.cost_cols = np.array([index.get(m.headers[c] + analytics.COST_SUFFIX, -1) for c in date_cols],
+                               dtype=np.int32)
+        for j, c in enumerate(date_cols):
+            kinds[c] = ("price", j)
+        for j, c in enumerate(m.cost_cols):
+            if c >= 0:
+                kinds[int(c)] = ("cost", j)
+        for c in range(width):
+            if c not in kinds:
+                m.extra[c] = _categorical(grid[:, c])
+                kinds[c] = ("extra", c)
+        m._columns = kinds
+        value_bytes = m._fill_values(grid)
+        m.source_bytes = m._estimate_source(grid, value_bytes)
+        _readonly(m.sheet_row, m.price_cols, m.cost_cols, m.price, m.cost, m.sold_out)
+        return m
+
+    def _fill_values(self, grid):
+        n, d = self.n_rows, len(self.dates)
+        price_raw = grid[:, self.price_cols] if d else np.empty((n, 0), dtype=object)
+        cost_raw = np.full((n, d), "", dtype=object)
+        has_cost = self.cost_cols >= 0
+        if has_cost.any():
+            cost_raw[:, has_cost] = grid[:, self.cost_cols[has_cost]]
+
+        # 售價與成本一起 factorize，每個不重複的字串只解析一次
+        flat = np.concatenate([price_raw.ravel(), cost_raw.ravel()])
+        codes, uniques = pd.factorize(flat)
+        parsed = [price_parser.parse_price(u) for u in uniques]
+        values = np.array([p.value if u.strip() else np.nan for p, u in zip(parsed, uniques)], dtype=np.float32)
+        sold_out = np.array([p.sold_out for p in parsed], dtype=bool)
+        lossy = np.array([u != _canonical(v) for u, v in zip(uniques, values)], dtype=bool)
+
+        cells = n * d
+        self.price = values[codes[:cells]].reshape(n, d)
+        self.cost = values[codes[cells:]].reshape(n, d)
+        self.sold_out = sold_out[codes[:cells]].reshape(n, d)
+
+        # 只保留無法還原的原始字串：代碼重新編號成緊湊的字串表
+        keep = np.nonzero(lossy)[0]
+        remap = np.full(len(uniques), -1, dtype=np.int32)
+        remap[keep] = np.arange(len(keep), dtype=np.int32)
+        self._raw_strings = np.asarray(uniques, dtype=object)[keep]
+        index_dtype = np.int32 if cells < 2 ** 31 else np.int64
+        for kind, part in (("price", codes[:cells]), ("cost", codes[cells:])):
+            where = np.nonzero(lossy[part])[0]
+            self._raw[kind] = (where.astype(index_dtype), remap[part[where]])
+            _readonly(*self._raw[kind])
+        # 回傳原本每格一個字串時，售價/成本字串的總大小 (估算記憶體用)
+        sizes = np.fromiter((sys.getsizeof(u) for u in uniques), dtype=np.int64, count=len(uniques))
+        return int(sizes[codes].sum())
+
+    def _estimate_source(self, grid, value_bytes):
+        # data (list of lists) 與 DataFrame 各有一份參照，字串本身每格獨立
+        n, width = grid.shape
+        other = sum(sys.getsizeof(v) for col in range(width) if self._columns[col][0] in ("fixed", "extra")
+                    for v in grid[:, col])
+        return value_bytes + other + 2 * _PTR * n * width + n * sys.getsizeof([])
+
+    # --- 讀取 ---
+    @property
+    def item(self):
+        return self.fixed["item"]
+
+    @property
+    def spec(self):
+        return self.fixed["spec"]
+
+    @property
+    def service(self):
+        return self.fixed["service"]
+
+    @property
+    def n_cols(self):
+        return len(self.headers)
+
+    def _lookup(self, kind, flat_index):
+        # 依扁平索引取回原始字串；沒保留的格子由數值還原
+        positions, codes = self._raw[kind]
+        matrix = self.price if kind == "price" else self.cost
+        flat_index = np.asarray(flat_index)
+        values = matrix.ravel()[flat_index]
+        out = np.array([_canonical(v) for v in values], dtype=object) if flat_index.size else np.empty(0, dtype=object)
+        if len(positions):
+            at = np.minimum(np.searchsorted(positions, flat_index), len(positions) - 1)
+            hit = positions[at] == flat_index
+            out[hit] = self._raw_strings[codes[at[hit]]]
+        return out
+
+    def raw_column(self, kind, j):
+        # 第 j 個日期的原始字串 (售價或成本)，與試算表內容相同
+        if kind == "cost" and self.cost_cols[j] < 0:
+            return np.full(self.n_rows, "", dtype=object)
+        return self._lookup(kind, np.arange(self.n_rows) * len(self.dates) + j)
+
+    def raw_row(self, kind, i):
+        d = len(self.dates)
+        return self._lookup(kind, np.arange(d) + i * d)
+
+    def cell(self, row, col):
+        # 試算表座標 (皆為 1-based) 的原始字串；超出範圍為空字串
+        if row == 1:
+            return self.header_row[col - 1] if col - 1 < len(self.header_row) else ""
+        i, c = row - 2, col - 1
+        if not (0 <= i < self.n_rows) or c not in self._columns:
+            return ""
+        kind, idx = self._columns[c]
+        if kind == "fixed":
+            value = self.fixed[idx][i]
+        elif kind == "extra":
+            value = self.extra[idx][i]
+        else:
+            return str(self._lookup(kind, [i * len(self.dates) + idx])[0])
+        return "" if pd.isna(value) else str(value)
+
+    def column(self, c):
+        # 0-based 欄索引的整欄原始字串
+        kind, idx = self._columns[c]
+        if kind == "fixed":
+            return np.asarray(self.fixed[idx], dtype=object)
+        if kind == "extra":
+            return np.asarray(self.extra[idx], dtype=object)
+        return self.raw_column(kind, idx)
+
+    def to_grid(self):
+        columns = [self.column(c) for c in range(len(self.header_row))]
+        body = [list(row) for row in zip(*columns)] if columns else []
+        return [list(self.header_row)] + body
+
+    # --- 記憶體 ---
+    def nbytes(self):
+        arrays = (self.sheet_row, self.price_cols, self.cost_cols, self.price, self.cost, self.sold_out)
+        total = sum(a.nbytes for a in arrays)
+        total += sum(_categorical_bytes(c) for c in self.fixed.values())
+        total += sum(_categorical_bytes(c) for c in self.extra.values())
+        total += sum(p.nbytes + c.nbytes for p, c in self._raw.values())
+        total += _PTR * len(self._raw_strings) + sum(sys.getsizeof(s) for s in self._raw_strings)
+        return int(total)
+
+    def memory(self):
+        return {
+            "bytes": self.nbytes(),
+            "source_bytes": self.source_bytes,
+            "raw_kept": int(sum(len(p) for p, _ in self._raw.values())),
+            "cells": int(self.n_rows * len(self.dates) * 2),
+        }
@@ -0,0 +1,96 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+# --- 價格字串解析 ---
+# 試算表裡的價格是人手輸入的字串 ("$1,200/斤"、"800元"、"1000-1200"、"售完")，
+# 同樣的字串會重複上千次，所以解析結果依原始字串做 LRU 快取；整欄解析時只處理不重複的值。
+
+_MONEY_RE = re.compile(r'\$(\d+\.?\d*)')
+_YUAN_RE = re.compile(r'(\d+\.?\d*)元')
+_NUM_RE = re.compile(r"[-+]?\d*\.\d+|\d+")
+_UNIT_RE = re.compile(r'(?:/|／|每)\s*([^\d\s$/／()（）]+)')
+# 整個值就是區間才算 ("1000-1200"、"$1000~1200元/斤")；括號裡的備註 "(3-4兩)" 不算
+_RANGE_RE = re.compile(r'^\$?\s*(\d+\.?\d*)\s*[-~～至到]\s*\$?\s*(\d+\.?\d*)\s*元?\s*'
+                       r'(?:(?:/|／|每)\s*[^\d\s$/／()（）]+)?$')
+SOLD_OUT_WORDS = ("售完", "完售", "缺貨")
+
+
+class ParsedPrice(NamedTuple):
+    value: float              # 代表價 (同舊版 clean_price：先取 "$" 後的數字，其次 "元" 前的數字，否則取最大的數字)，無法解析為 0
+    min: Optional[float]      # 區間下限；非區間時等於 value
+    max: Optional[float]      # 區間上限；非區間時等於 value
+    unit: str                 # "斤"、"隻"... 沒寫單位為空字串
+    sold_out: bool
+    has_currency: bool        # 原字串已帶 "$"
+
+
+_EMPTY = ParsedPrice(0.0, None, None, "", False, False)
+
+
+@lru_cache(maxsize=65536)
+def _parse(raw):
+    text = raw.replace(",", "").strip()
+    sold_out = any(w in text for w in SOLD_OUT_WORDS)
+    unit_match = _UNIT_RE.search(text)
+    unit = unit_match.group(1).rstrip("元") if unit_match else ""
+    has_currency = "$" in text
+
+    money = _MONEY_RE.search(text)
+    if money:
+        value = float(money.group(1))
+    else:
+        yuan = _YUAN_RE.search(text)
+        if yuan:
+            value = float(yuan.group(1))
+        else:
+            nums = _NUM_RE.findall(text.replace("$", ""))
+            value = max(float(n) for n in nums) if nums else 0.0
+    if value == 0.0:
+        return ParsedPrice(0.0, None, None, unit, sold_out, has_currency)
+    range_match = _RANGE_RE.match(text)
+    if range_match:
+        low, high = sorted((float(range_match.group(1)), float(range_match.group(2))))
+        return ParsedPrice(value, low, high, unit, sold_out, has_currency)
+    return ParsedPrice(value, value, value, unit, sold_out, has_currency)
+
+
+def parse_price(raw):
+    if not isinstance(raw, str):
+        return _EMPTY
+    return _parse(raw)
+
+
+def clean_price(price_str):
+    return parse_price(price_str).value
+
+
+def parse_column(values):
+    # 整欄解析：回傳與輸入等長的 DataFrame (value, min, max, unit, sold_out)
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    parsed = [parse_price(u) for u in uniques]
+    parsed.append(_EMPTY)  # codes == -1 (NaN/None) 對應到最後一筆
+    table = pd.DataFrame(parsed, columns=ParsedPrice._fields)
+    table = table.iloc[codes].reset_index(drop=True)
+    return table.astype({"value": float, "min": float, "max": float, "sold_out": bool})
+
+
+def price_values(values):
+    # 只需要數值時的快速路徑，回傳 float ndarray
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    lookup = np.fromiter((parse_price(u).value for u in uniques), dtype=float, count=len(uniques))
+    lookup = np.append(lookup, 0.0)
+    return lookup[codes]
+
+
+def format_display(price):
+    # 報價圖上的價格：有數字、沒有 "$" 且不是售完才加上 "$" (「時價」之類的文字原樣顯示)
+    if not isinstance(price, str) or not price.strip():
+        return price if isinstance(price, str) else ""
+    parsed = parse_price(price)
+    if parsed.has_currency or parsed.sold_out or parsed.value <= 0:
+        return price
+    return f"${price}"
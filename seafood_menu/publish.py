@@ -0,0 +1,241 @@
+import json
+import random
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+# --- 發布流程 ---
+# 把「新增欄位 + 標題 + 售價 + 成本」組成單一個 spreadsheets.batchUpdate 請求，
+# 只送出與試算表現況不同的儲存格；遇到 429 / 5xx 以指數退避重試。
+# 快照可能已過期 (別人剛加了欄或改了值)，寫入前 refresh_plan() 以一次 batch_get
+# 重新讀取標題列與目標欄，再依現況重建計畫。
+# submit() 讓寫入與報價圖繪製在背景執行緒同時進行，畫面不必等兩者依序完成。
+
+RETRY_STATUS = (429, 500, 502, 503)
+MAX_RETRIES = 5
+BASE_DELAY = 1.0
+_SHEETS_EPOCH = datetime(1899, 12, 30)  # 試算表日期序號的起點
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="publish")
+
+
+@dataclass
+class PublishPlan:
+    date_str: str
+    price_col: int          # 1-based
+    cost_col: int           # 1-based
+    is_new_date: bool
+    add_cols: int = 0       # 需要在工作表右側新增的欄數
+    cells: list = field(default_factory=list)  # [(row, col, value)]，含標題列
+
+
+@dataclass
+class PublishResult:
+    cells: int
+    bytes_sent: int
+    round_trips: int
+    attempts: int
+    elapsed_ms: float
+
+
+def build_plan(snapshot, date_str, updates, col_count):
+    raw_headers = snapshot.raw_headers
+    if date_str in raw_headers:
+        price_col = raw_headers.index(date_str) + 1
+        cost_col_name = f"{date_str}_成本"
+        if cost_col_name in raw_headers:
+            cost_col = raw_headers.index(cost_col_name) + 1
+        else:
+            cost_col = price_col + 1
+        plan = PublishPlan(date_str, price_col, cost_col, is_new_date=False)
+    else:
+        current_cols = len(raw_headers)
+        price_col = current_cols + 1
+        cost_col = current_cols + 2
+        plan = PublishPlan(date_str, price_col, cost_col, is_new_date=True,
+                           add_cols=max(0, cost_col - col_count))
+        plan.cells.append((1, price_col, date_str))
+        plan.cells.append((1, cost_col, f"{date_str}_成本"))
+
+    for u in updates:
+        row = int(u['sheet_row'])
+        for col, value in ((price_col, u['price']), (cost_col, u['cost'])):
+            value = "" if value is None else str(value)
+            if value != snapshot.cell(row, col):
+                plan.cells.append((row, col, value))
+    return plan
+
+
+class LiveSheet:
+    # 寫入前讀回的標題列與目標欄，提供與 SheetSnapshot 相同的 raw_headers / cell() 給 build_plan
+    def __init__(self, header, columns, width=0):
+        # header：第 1 列 (API 會去掉尾端空白)，補到快照的寬度，避免新日期蓋到沒有標題但有資料的欄
+        self.raw_headers = [str(h).strip() for h in header]
+        self.raw_headers += [""] * (width - len(self.raw_headers))
+        self.columns = columns  # 1-based 欄號 -> 該欄由第 1 列起的值
+
+    def cell(self, row, col):
+        values = self.columns.get(col, [])
+        return str(values[row - 1]) if row - 1 < len(values) else ""
+
+
+def _col_letter(col):
+    from gspread.utils import rowcol_to_a1
+    return rowcol_to_a1(1, col).rstrip("0123456789")
+
+
+def read_live(worksheet, cols, width=0):
+    cols = sorted(cols)
+    ranges = ["1:1"] + [f"{_col_letter(c)}:{_col_letter(c)}" for c in cols]
+    results = worksheet.batch_get(ranges, major_dimension="COLUMNS")
+    header = [values[0] if values else "" for values in results[0]]
+    columns = {c: list(values[0]) if values else [] for c, values in zip(cols, results[1:])}
+    return LiveSheet(header, columns, width)
+
+
+def live_col_count(worksheet):
+    # worksheet.col_count 是開啟工作表時的值，別人加過欄就不準
+    meta = worksheet.spreadsheet.fetch_sheet_metadata(
+        {"fields": "sheets(properties(sheetId,gridProperties(columnCount)))"})
+    for sheet in meta["sheets"]:
+        if sheet["properties"]["sheetId"] == worksheet.id:
+            return sheet["properties"]["gridProperties"]["columnCount"]
+    return worksheet.col_count
+
+
+def refresh_plan(worksheet, plan, updates, width=0):
+    # 先讀快照算出的目標欄；若現況的標題指向別的欄 (欄位被新增/搬動)，再讀一次那些欄
+    live = read_live(worksheet, {plan.price_col, plan.cost_col}, width)
+    fresh = build_plan(live, plan.date_str, updates, 0)
+    missing = {fresh.price_col, fresh.cost_col} - set(live.columns)
+    if missing:
+        live = read_live(worksheet, set(live.columns) | missing, width)
+        fresh = build_plan(live, plan.date_str, updates, 0)
+    if fresh.is_new_date:
+        # 只有新日期需要知道目前的欄數 (決定要新增幾欄)
+        fresh.add_cols = max(0, fresh.cost_col - live_col_count(worksheet))
+    return fresh
+
+
+def _cell_data(value):
+    # 空字串不帶 userEnteredValue，搭配 fields 遮罩即為清除儲存格；其餘以純文字寫入 (同 update_cells 的 RAW)
+    return {"userEnteredValue": {"stringValue": value}} if value != "" else {}
+
+
+def _header_data(value):
+    # 標題列沿用舊版 update_cell (USER_ENTERED) 的結果：日期標題存成日期值，
+    # 並固定顯示格式為 yyyy/mm/dd，讀回的文字才會與 date_str 一致；其餘標題為純文字
+    try:
+        day = datetime.strptime(value, "%Y/%m/%d")
+    except ValueError:
+        return _cell_data(value)
+    return {"userEnteredValue": {"numberValue": (day - _SHEETS_EPOCH).days},
+            "userEnteredFormat": {"numberFormat": {"type": "DATE", "pattern": "yyyy/mm/dd"}}}
+
+
+def build_requests(sheet_id, plan):
+    requests = []
+    if plan.add_cols:
+        requests.append({"appendDimension": {"sheetId": sheet_id, "dimension": "COLUMNS", "length": plan.add_cols}})
+
+    # 同一欄連續的列合併成一個 updateCells；標題列另外送 (欄位遮罩含日期格式，不能套到價格上)
+    by_col = {}
+    for row, col, value in plan.cells:
+        if row == 1:
+            requests.append({"updateCells": {
+                "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": col - 1},
+                "rows": [{"values": [_header_data(value)]}],
+                "fields": "userEnteredValue,userEnteredFormat.numberFormat",
+            }})
+        else:
+            by_col.setdefault(col, {})[row] = value
+    for col in sorted(by_col):
+        rows = sorted(by_col[col])
+        start = 0
+        while start < len(rows):
+            end = start
+            while end + 1 < len(rows) and rows[end + 1] == rows[end] + 1:
+                end += 1
+            requests.append({"updateCells": {
+                "start": {"sheetId": sheet_id, "rowIndex": rows[start] - 1, "columnIndex": col - 1},
+                "rows": [{"values": [_cell_data(by_col[col][r])]} for r in rows[start:end + 1]],
+                "fields": "userEnteredValue",
+            }})
+            start = end + 1
+    return requests
+
+
+def _status(error):
+    # 先看 HTTP 狀態碼：回應不是 JSON (例如前端回的 502/503 HTML 頁) 時 gspread 的 code 為 -1
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return response.status_code
+    return getattr(error, "code", None)
+
+
+def with_backoff(fn, max_retries=MAX_RETRIES, base_delay=BASE_DELAY, on_retry=None):
+    # 回傳 (結果, 嘗試次數)
+    from gspread.exceptions import APIError
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn(), attempt
+        except APIError as e:
+            if _status(e) not in RETRY_STATUS or attempt > max_retries:
+                raise
+            delay = base_delay * 2 ** (attempt - 1) + random.uniform(0, base_delay)
+            if on_retry is not None:
+                on_retry(attempt, delay, e)
+            time.sleep(delay)
+
+
+def execute(worksheet, plan, max_retries=MAX_RETRIES, on_retry=None):
+    start = time.perf_counter()
+    requests = build_requests(worksheet.id, plan)
+    if not requests:
+        return PublishResult(0, 0, 0, 0, 0.0)
+    body = {"requests": requests}
+    size = len(json.dumps(body, ensure_ascii=False).encode("utf-8"))
+    _, attempts = with_backoff(lambda: worksheet.spreadsheet.batch_update(body),
+                               max_retries=max_retries, on_retry=on_retry)
+    return PublishResult(len(plan.cells), size, attempts, attempts, (time.perf_counter() - start) * 1000)
+
+
+class PublishJob:
+    def __init__(self, plan):
+        self.plan = plan
+        self.retry = {"attempt": 0, "message": ""}  # 寫入重試中的狀態，供畫面顯示
+        self.traced = False  # 結果是否已記入效能追蹤
+        self.write = None
+        self.render = None
+
+    def futures(self):
+        return [f for f in (self.write, self.render) if f is not None]
+
+    def done(self):
+        return all(f.done() for f in self.futures())
+
+
+def submit(worksheet, plan, render_fn=None, on_written=None, refresh=None):
+    # render_fn 在背景執行緒執行，不可呼叫 st.*；on_written(plan) 在寫入結束 (不論成敗) 後呼叫
+    # refresh：回傳依試算表現況重建的計畫，寫入前在背景執行緒呼叫
+    job = PublishJob(plan)
+
+    def on_retry(attempt, delay, error):
+        job.retry.update(attempt=attempt, message=f"{delay:.0f} 秒後重試：{error}")
+
+    def write():
+        try:
+            if refresh is not None:
+                job.plan, _ = with_backoff(refresh, on_retry=on_retry)
+            return execute(worksheet, job.plan, on_retry=on_retry)
+        finally:
+            if on_written is not None:
+                on_written(job.plan)
+
+    job.write = _executor.submit(write)
+    if render_fn is not None:
+        job.render = _executor.submit(render_fn)
+    return job
@@ -0,0 +1,168 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from PIL import Image, ImageFont
+
+from . import font_assets
+
+# --- 繪圖素材快取 ---
+# 字體、背景、浮水印在整個行程內只載入一次：字體依路徑與大小快取 (字體檔的來源見 font_assets)，
+# 背景解碼一次，縮放後的版本只留最近 _MAX_BACKGROUNDS 張且總大小不超過 _MAX_BACKGROUND_BYTES
+# (不分頁的長圖一張就可能上百 MB，高度又隨品項數改變，不值得多留)，
+# 浮水印依檔案修改時間 (或上傳檔的雜湊) 快取已套好透明度的版本。
+
+BACKGROUND_CANDIDATES = ("bg_cny.png", "bg_cny.jpg", "bg_2026.png")
+WATERMARK_CANDIDATES = ("logo.png", "logo.jpg")
+WATERMARK_OPACITY = 0.20  # 透明度 20%，看得見但不會搶走文字風采
+_WATERMARK_LUT = [int(p * WATERMARK_OPACITY) for p in range(256)]
+
+_watermark_lock = threading.Lock()
+_watermarks = OrderedDict()
+_MAX_WATERMARKS = 8
+
+_background_lock = threading.Lock()
+_backgrounds = OrderedDict()
+_MAX_BACKGROUNDS = 2
+_MAX_BACKGROUND_BYTES = 48 * 1024 * 1024
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=32)
+def _load_font(path, mtime, size):
+    return ImageFont.truetype(path, size)
+
+
+def get_font(size, path=None):
+    # path 通常是 font_assets.subset_for() 產生的子集字體；找不到字體時退回 Pillow 內建字體
+    path = path or font_assets.find_font()
+    if path is None:
+        return ImageFont.load_default(size)
+    try:
+        return _load_font(path, _mtime(path), size)
+    except Exception:
+        return ImageFont.load_default(size)
+
+
+def find_background():
+    for candidate in BACKGROUND_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+@lru_cache(maxsize=2)
+def _decode_background(path, mtime):
+    img = Image.open(path).convert("RGB")
+    img.load()
+    return img
+
+
+def _image_bytes(img):
+    return img.size[0] * img.size[1] * len(img.getbands())
+
+
+def _resized_background(path, mtime, width, height):
+    # 回傳可直接繪製的圖 (快取裡的一律給複本)
+    key = (path, mtime, width, height)
+    with _background_lock:
+        if key in _backgrounds:
+            _backgrounds.move_to_end(key)
+            return _backgrounds[key].copy()
+    img = _decode_background(path, mtime).resize((width, height))
+    if _image_bytes(img) > _MAX_BACKGROUND_BYTES:
+        return img  # 太大的不快取，也省下一次複製
+    with _background_lock:
+        _backgrounds[key] = img
+        while (len(_backgrounds) > _MAX_BACKGROUNDS
+               or sum(_image_bytes(i) for i in _backgrounds.values()) > _MAX_BACKGROUND_BYTES):
+            _backgrounds.popitem(last=False)
+    return img.copy()
+
+
+def get_background(width, height, path=None):
+    # 回傳可直接繪製的複本；沒有背景檔或讀取失敗時回傳 None
+    # path：None 自動尋找 BACKGROUND_CANDIDATES，False 不使用背景，字串為指定檔案；
+    # get_watermark、menu_image.render_page 與 render_batch.Variant 的背景/浮水印參數都沿用這個約定
+    if path is None:
+        path = find_background()
+    if not path:
+        return None
+    try:
+        return _resized_background(path, _mtime(path), width, height)
+    except Exception:
+        return None
+
+
+def find_watermark():
+    for candidate in WATERMARK_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _upload_bytes(upload):
+    if hasattr(upload, "getvalue"):
+        return upload.getvalue()
+    upload.seek(0)
+    return upload.read()
+
+
+def get_watermark(target_h, manual_upload=None, path=None):
+    # 回傳已縮放到 target_h 並套好透明度的 RGBA 圖；沒有浮水印時回傳 None
+    # path 的用法同 get_background (自動尋找 WATERMARK_CANDIDATES)
+    if path is None:
+        path = find_watermark()
+    if path:
+        key = (path, _mtime(path), target_h)
+        source = path
+    elif manual_upload is not None:
+        data = _upload_bytes(manual_upload)
+        key = ("upload", hashlib.sha1(data).hexdigest(), target_h)
+        source = data
+    else:
+        return None
+
+    with _watermark_lock:
+        if key in _watermarks:
+            _watermarks.move_to_end(key)
+            return _watermarks[key]
+
+    wm = Image.open(source if isinstance(source, str) else io.BytesIO(source)).convert("RGBA")
+    ratio = target_h / float(wm.size[1])
+    target_w = int(float(wm.size[0]) * float(ratio))
+    wm = wm.resize((target_w, target_h))
+    wm.putalpha(wm.getchannel("A").point(_WATERMARK_LUT))
+
+    with _watermark_lock:
+        _watermarks[key] = wm
+        while len(_watermarks) > _MAX_WATERMARKS:
+            _watermarks.popitem(last=False)
+    return wm
+
+
+def background_identity():
+    path = find_background()
+    return f"{path}:{_mtime(path)}" if path else ""
+
+
+def watermark_identity(manual_upload=None):
+    path = find_watermark()
+    if path is not None:
+        return f"{path}:{_mtime(path)}"
+    if manual_upload is not None:
+        return "upload:" + hashlib.sha1(_upload_bytes(manual_upload)).hexdigest()
+    return ""
+
+
+def font_identity():
+    return font_assets.font_identity()
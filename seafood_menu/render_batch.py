@@ -0,0 +1,206 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional
+
+from . import analytics
+from . import font_assets
+from . import menu_image
+from . import perf
+from . import sheet_mirror
+from .menu_layout import LayoutOptions
+
+# --- 批次輸出報價圖 (不需 Streamlit) ---
+# 從匯出的 CSV 或本機鏡像 (sheet_mirror 的 SQLite) 讀取價格表，
+# 一次為多個日期 × 多個門市版本 (背景、浮水印、欄數、分頁、格式) 產生報價圖，
+# 每張圖在獨立的行程中繪製，可用上所有 CPU 核心。
+#
+#   python -m seafood_menu.render_batch --csv prices.csv --last 4 --out out/
+#   python -m seafood_menu.render_batch --mirror .cache/sheet_mirror.sqlite --sheet-url URL --all --variants stores.json
+#
+# stores.json 範例：
+#   [{"name": "taipei", "background": "bg_cny.png", "watermark": "logo.png", "columns": 2},
+#    {"name": "line", "background": false, "columns": 1, "max_height": 4000, "format": "JPEG"}]
+
+
+@dataclass
+class Variant:
+    name: str = "default"
+    background: object = None       # 同 render_assets.get_background 的 path
+    watermark: object = None
+    columns: int = 2
+    max_height: Optional[int] = None
+    format: str = "PNG"
+    quality: int = 90
+
+
+@dataclass
+class RenderJob:
+    date_label: str         # 欄位標題 (重複日期會帶 _1、_2)，用於檔名與訊息
+    variant: Variant
+    plot_df: object
+    out_dir: str
+    date_str: str = ""      # 畫在圖上的日期 (去掉重複標題的後綴)
+
+
+def load_grid_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        grid = [row for row in csv.reader(f)]
+    width = len(grid[0]) if grid else 0
+    return [(row + [""] * (width - len(row)))[:width] for row in grid]
+
+
+def load_grid_mirror(path, sheet_url):
+    columns, _ = sheet_mirror.SheetMirror(path, sheet_url).load()
+    if columns is None:
+        raise SystemExit(f"鏡像 {path} 中沒有 {sheet_url} 的資料，請先在 App 中開啟一次該試算表")
+    return sheet_mirror.columns_to_grid(columns)
+
+
+def load_variants(path, args):
+    if path is None:
+        return [Variant(columns=args.columns, max_height=args.max_height, format=args.format, quality=args.quality)]
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    variants = []
+    for i, item in enumerate(raw if isinstance(raw, list) else [raw]):
+        v = Variant(name=item.get("name") or f"variant{i + 1}", columns=args.columns, max_height=args.max_height,
+                    format=args.format, quality=args.quality)
+        for key, value in item.items():
+            if key != "name" and hasattr(v, key):
+                setattr(v, key, value)
+        if v.format not in menu_image.EXPORT_FORMATS:
+            raise SystemExit(f"{v.name}: 不支援的格式 {v.format}")
+        variants.append(v)
+    return variants
+
+
+def select_dates(df, args):
+    labels = analytics.date_columns(df)
+    if args.dates:
+        missing = [d for d in args.dates if d not in labels]
+        if missing:
+            raise SystemExit(f"找不到日期欄：{', '.join(missing)}")
+        return list(args.dates)
+    if args.all:
+        return labels
+    return labels[-args.last:] if args.last > 0 else []
+
+
+def display_date(label):
+    # 重複的日期標題去重後為 2025/01/10_1，圖上只畫日期本身
+    return re.sub(r"_\d+$", "", label)
+
+
+def _safe_name(text):
+    return re.sub(r"[^\w-]+", "", str(text)) or "menu"
+
+
+def render_job(job):
+    # 在子行程中執行：繪製、編碼並寫檔，回傳 (日期, 版本, 檔案路徑, 各階段耗時)
+    timings = {}
+    v = job.variant
+    options = LayoutOptions(columns=v.columns, max_height=v.max_height)
+    pages = menu_image.render_pages(job.plot_df, job.date_str or job.date_label, options=options, timings=timings,
+                                    background=v.background, watermark=v.watermark)
+    files = menu_image.export_pages(pages, v.format, v.quality, f"menu_{_safe_name(job.date_label)}", timings)
+    folder = os.path.join(job.out_dir, _safe_name(v.name))
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for file in files:
+        path = os.path.join(folder, file.name)
+        with open(path, "wb") as f:
+            f.write(file.data)
+        paths.append(path)
+    return job.date_label, v.name, paths, timings
+
+
+def build_jobs(df, dates, variants, out_dir):
+    jobs = []
+    for label in dates:
+        plot_df = analytics.plot_frame(df, label)
+        if plot_df.empty:
+            print(f"略過 {label}：沒有任何售價", file=sys.stderr)
+            continue
+        date_str = display_date(label)
+        missing = font_assets.missing_glyphs(menu_image.menu_text(plot_df, date_str))
+        if missing:
+            print(f"⚠️ {label}：字體缺少 {missing}", file=sys.stderr)
+        jobs.extend(RenderJob(label, v, plot_df, out_dir, date_str) for v in variants)
+    return jobs
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="批次產生多個日期 / 門市版本的報價圖")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="從試算表匯出的 CSV (第一列為標題)")
+    source.add_argument("--mirror", help="App 的本機鏡像 SQLite 路徑 (預設在 .cache/sheet_mirror.sqlite)")
+    parser.add_argument("--sheet-url", help="搭配 --mirror：試算表網址 (鏡像內的索引鍵)")
+    which = parser.add_mutually_exclusive_group()
+    which.add_argument("--dates", nargs="+", help="指定日期欄標題，例如 2025/01/10")
+    which.add_argument("--all", action="store_true", help="所有日期欄")
+    which.add_argument("--last", type=int, default=1, help="最近 N 個日期欄 (預設 1)")
+    parser.add_argument("--list", action="store_true", help="只列出可用的日期欄")
+    parser.add_argument("--variants", help="門市版本設定 JSON (背景、浮水印、欄數、分頁高度、格式)")
+    parser.add_argument("--columns", type=int, default=2, help="預設欄數")
+    parser.add_argument("--max-height", type=int, default=None, help="預設單頁最大高度 (px)，不指定則不分頁")
+    parser.add_argument("--format", default="PNG", choices=list(menu_image.EXPORT_FORMATS), help="預設輸出格式")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG / WebP 品質")
+    parser.add_argument("--out", default="menu_out", help="輸出資料夾")
+    parser.add_argument("--workers", type=int, default=None, help="行程數 (預設為 CPU 核心數)")
+    args = parser.parse_args(argv)
+    if args.mirror and not args.sheet_url:
+        parser.error("--mirror 需要搭配 --sheet-url")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    grid = load_grid_csv(args.csv) if args.csv else load_grid_mirror(args.mirror, args.sheet_url)
+    if not grid:
+        raise SystemExit("價格表是空的")
+    _, df = sheet_mirror.build_dataframe(grid)
+
+    if args.list:
+        for label in analytics.date_columns(df):
+            print(label)
+        return 0
+
+    variants = load_variants(args.variants, args)
+    jobs = build_jobs(df, select_dates(df, args), variants, args.out)
+    if not jobs:
+        print("沒有需要輸出的報價圖", file=sys.stderr)
+        return 1
+
+    # 繪圖不連網：字體需事先放好 (python -m seafood_menu.font_assets --download)
+    if font_assets.find_font() is None:
+        print("⚠️ 找不到中文字體，圖片上的中文會無法顯示", file=sys.stderr)
+    else:
+        # 先建好涵蓋所有報價圖文字的子集字體，各個繪圖行程直接使用
+        font_assets.ensure_subset("".join(menu_image.menu_text(job.plot_df, job.date_str) for job in jobs))
+
+    start = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(render_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                label, name, paths, timings = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"✗ {job.date_label} [{job.variant.name}]：{e}", file=sys.stderr)
+                continue
+            print(f"✓ {label} [{name}] → {', '.join(paths)}  ({perf.format_timings(timings)})")
+    print(f"完成 {len(jobs) - failed}/{len(jobs)} 張，耗時 {time.perf_counter() - start:.1f} 秒")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
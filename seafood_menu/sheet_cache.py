@@ -0,0 +1,212 @@
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from . import perf
+from . import sheet_mirror
+from . import startup
+from .price_matrix import PriceMatrix
+
+# --- 試算表快取層 ---
+# Streamlit 每次互動都會重跑整支 app.py，這裡把「授權 → 開啟 → get_all_values → 建 DataFrame」
+# 的結果快取在行程內，所有分頁 (session) 共用同一份快照，直到 TTL 到期或發布後主動失效。
+# 快取失效時透過 sheet_mirror 做增量同步；容器剛重啟時先用本機鏡像秒開，背景再與試算表對帳。
+
+SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+DEFAULT_TTL = 300  # 秒，可用 secrets 的 cache_ttl_seconds 覆寫
+DEFAULT_MIRROR_PATH = ".cache/sheet_mirror.sqlite"  # secrets 的 mirror_path 設為空字串可停用鏡像
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SheetSnapshot:
+    matrix: PriceMatrix  # 精簡的價格表 (Categorical + float32 矩陣)；跨 session 共用，唯讀
+    fetched_at: float
+    fetch_ms: float
+    source: str = "full"  # full / delta / mirror
+    derived: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def raw_headers(self):
+        # 第一列標題 (已 strip，未去重)
+        return self.matrix.raw_headers
+
+    def cell(self, row, col):
+        return self.matrix.cell(row, col)
+
+    def derive(self, name, builder):
+        # 以快照為單位快取衍生資料 (歷史、毛利總覽等)，快照換新時自然失效
+        if name not in self.derived:
+            self.derived[name] = builder(self)
+        return self.derived[name]
+
+    def memory(self):
+        # 快照本身與衍生資料的記憶體用量 (bytes)
+        derived = 0
+        for value in list(self.derived.values()):
+            if isinstance(value, pd.DataFrame):
+                derived += int(value.memory_usage(deep=True).sum())
+            elif isinstance(value, np.ndarray):
+                derived += int(value.nbytes)
+            elif callable(getattr(value, "nbytes", None)):  # PriceHistory、HistoryStats 等自行估算
+                derived += int(value.nbytes())
+        return dict(self.matrix.memory(), derived_bytes=derived)
+
+
+_lock = threading.Lock()
+_dirty_lock = threading.Lock()  # _sync 也在背景對帳執行緒 (不持有 _lock) 中執行
+_snapshots = {}
+_dirty = {}        # sheet_url -> 發布時寫過的欄 (0-based)，下次增量同步要重抓
+_force_full = set()
+_reconciling = set()
+_warm = set()      # 本行程已與試算表同步過的網址；只有冷啟動才直接用鏡像
+_generation = {}   # invalidate 次數，背景對帳完成時用來判斷結果是否已過期
+_stats = {"hits": 0, "misses": 0, "last_ms": 0.0, "last_fetch_ms": 0.0, "source": "", "fetched_cols": 0}
+
+
+@st.cache_resource(show_spinner=False)
+def get_google_sheet_client():
+    # gspread / oauth2client 只在第一次連線時載入，冷啟動不必付出這段匯入時間
+    gspread = startup.lazy_import("gspread")
+    service_account = startup.lazy_import("oauth2client.service_account")
+    creds_dict = json.loads(st.secrets["service_account_json"])
+    with perf.span("sheet_auth"):
+        creds = service_account.ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
+        return gspread.authorize(creds)
+
+
+@st.cache_resource(show_spinner=False)
+def get_worksheet(sheet_url):
+    client = get_google_sheet_client()
+    with perf.span("sheet_open"):
+        return client.open_by_url(sheet_url).sheet1
+
+
+def reset_worksheet():
+    # 新增欄位等結構變更後呼叫，下次重新開啟工作表以取得最新的 col_count
+    get_worksheet.clear()
+
+
+def get_ttl():
+    try:
+        return float(st.secrets.get("cache_ttl_seconds", DEFAULT_TTL))
+    except Exception:
+        return DEFAULT_TTL
+
+
+def get_mirror(sheet_url):
+    try:
+        path = st.secrets.get("mirror_path", DEFAULT_MIRROR_PATH)
+    except Exception:
+        path = DEFAULT_MIRROR_PATH
+    return sheet_mirror.SheetMirror(path, sheet_url) if path else None
+
+
+def _make_snapshot(data, start, source):
+    # 原始二維陣列轉成精簡表示後即丟棄，不隨快照保留
+    with perf.span("snapshot"):
+        matrix = PriceMatrix.from_grid(data)
+    fetch_ms = (time.perf_counter() - start) * 1000
+    return SheetSnapshot(matrix, time.time(), fetch_ms, source)
+
+
+def _sync(sheet_url, mirror):
+    # 同步成功才清掉寫過的欄與強制全量的旗標；失敗時保留，下次重試仍會重抓這些欄
+    sheet = get_worksheet(sheet_url)
+    with _dirty_lock:
+        dirty = set(_dirty.get(sheet_url, ()))
+    if mirror is None or sheet_url in _force_full:
+        result = sheet_mirror.full_sync(sheet, mirror)
+        _force_full.discard(sheet_url)
+    else:
+        result = sheet_mirror.delta_sync(sheet, mirror, dirty_cols=dirty)
+    with _dirty_lock:
+        remaining = _dirty.get(sheet_url, set()) - dirty  # 同步期間又有發布寫入的欄留到下次
+        if remaining:
+            _dirty[sheet_url] = remaining
+        else:
+            _dirty.pop(sheet_url, None)
+    return result
+
+
+def _reconcile(sheet_url, mirror, generation):
+    # 背景執行緒：鏡像秒開之後與試算表對帳，完成後替換快照 (網路請求期間不持有鎖)
+    start = time.perf_counter()
+    try:
+        data, info = _sync(sheet_url, mirror)
+        snap = _make_snapshot(data, start, info["mode"])
+        with _lock:
+            _warm.add(sheet_url)
+            if _generation.get(sheet_url, 0) == generation:
+                _snapshots[sheet_url] = snap
+                _stats["last_fetch_ms"] = snap.fetch_ms
+                _stats["source"] = info["mode"]
+                _stats["fetched_cols"] = info["fetched_cols"]
+    except Exception:
+        logger.exception("背景同步試算表失敗")
+    finally:
+        _reconciling.discard(sheet_url)
+
+
+def load_snapshot(sheet_url, ttl=None):
+    if ttl is None:
+        ttl = get_ttl()
+    start = time.perf_counter()
+    with _lock:
+        snap = _snapshots.get(sheet_url)
+        if snap is not None and time.time() - snap.fetched_at < ttl:
+            _stats["hits"] += 1
+        else:
+            mirror = get_mirror(sheet_url)
+            cold = sheet_url not in _warm and mirror is not None
+            columns, meta = None, None
+            if cold:
+                with perf.span("mirror"):
+                    columns, meta = mirror.load()
+            if columns:
+                # 冷啟動：直接用鏡像，背景再對帳
+                snap = _make_snapshot(sheet_mirror.columns_to_grid(columns), start, "mirror")
+                info = {"mode": "mirror", "fetched_cols": 0}
+                if sheet_url not in _reconciling:
+                    _reconciling.add(sheet_url)
+                    generation = _generation.get(sheet_url, 0)
+                    threading.Thread(target=_reconcile, args=(sheet_url, mirror, generation), daemon=True).start()
+            else:
+                with perf.span("fetch"):
+                    data, info = _sync(sheet_url, mirror)
+                snap = _make_snapshot(data, start, info["mode"])
+                _warm.add(sheet_url)
+            _snapshots[sheet_url] = snap
+            _stats["misses"] += 1
+            _stats["last_fetch_ms"] = snap.fetch_ms
+            _stats["source"] = info["mode"]
+            _stats["fetched_cols"] = info["fetched_cols"]
+        _stats["last_ms"] = (time.perf_counter() - start) * 1000
+    return snap
+
+
+def invalidate(sheet_url=None, dirty_cols=(), full=False):
+    # 發布寫入後呼叫，下一次 load_snapshot 會重新抓取；dirty_cols 為寫入過的欄 (0-based)
+    with _lock:
+        if sheet_url is None:
+            _snapshots.clear()
+            return
+        _snapshots.pop(sheet_url, None)
+        _generation[sheet_url] = _generation.get(sheet_url, 0) + 1
+        _warm.add(sheet_url)
+        with _dirty_lock:
+            _dirty.setdefault(sheet_url, set()).update(dirty_cols)
+        if full:
+            _force_full.add(sheet_url)
+
+
+def get_stats():
+    with _lock:
+        return dict(_stats)
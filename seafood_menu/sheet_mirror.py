@@ -0,0 +1,210 @@
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+# --- 本機試算表鏡像 ---
+# 以 SQLite 依「欄」存放整張價格表 (每欄一筆 JSON，含第一列標題)，
+# 重啟後可直接從鏡像載入，再只向 Google 抓取可能變動的欄位：
+#   * 固定欄 (品項名稱/規格/代工資訊)：用來偵測新增列或列被插入/重排
+#   * 最後 RECENT_COLS 欄與新增欄：最近幾週的售價/成本最常被修改
+#   * 發布時寫入過的欄 (dirty)
+# 標題或固定欄與鏡像對不上 (有人插入欄/列) 就退回完整同步，確保 sheet_row 對應不會錯位。
+
+FIXED_HEADERS = ('品項名稱', '規格', '代工資訊')
+RECENT_COLS = 8
+FULL_SYNC_INTERVAL = 6 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheet_columns (
+    sheet_url TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    cells TEXT NOT NULL,
+    PRIMARY KEY (sheet_url, idx)
+);
+CREATE TABLE IF NOT EXISTS sheet_meta (
+    sheet_url TEXT PRIMARY KEY,
+    n_rows INTEGER NOT NULL,
+    n_cols INTEGER NOT NULL,
+    synced_at REAL NOT NULL,
+    full_synced_at REAL NOT NULL
+);
+"""
+
+
+class SheetMirror:
+    def __init__(self, path, sheet_url):
+        self.path = path
+        self.sheet_url = sheet_url
+
+    def _connect(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def load(self):
+        # 回傳 (columns, meta)；沒有鏡像時 columns 為 None
+        if not os.path.exists(self.path):
+            return None, None
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT n_rows, n_cols, synced_at, full_synced_at FROM sheet_meta WHERE sheet_url = ?",
+                (self.sheet_url,),
+            ).fetchone()
+            if row is None:
+                return None, None
+            meta = {"n_rows": row[0], "n_cols": row[1], "synced_at": row[2], "full_synced_at": row[3]}
+            columns = [[] for _ in range(meta["n_cols"])]
+            for idx, cells in conn.execute(
+                "SELECT idx, cells FROM sheet_columns WHERE sheet_url = ?", (self.sheet_url,)
+            ):
+                if idx < meta["n_cols"]:
+                    columns[idx] = json.loads(cells)
+        finally:
+            conn.close()
+        return [_pad(c, meta["n_rows"]) for c in columns], meta
+
+    def save(self, columns, changed=None, full=False):
+        # changed: 需要重寫的欄索引；None 代表全部
+        n_rows = max((len(c) for c in columns), default=0)
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                prev = conn.execute(
+                    "SELECT full_synced_at FROM sheet_meta WHERE sheet_url = ?", (self.sheet_url,)
+                ).fetchone()
+                full_synced_at = now if full or prev is None else prev[0]
+                if changed is None:
+                    conn.execute("DELETE FROM sheet_columns WHERE sheet_url = ?", (self.sheet_url,))
+                    changed = range(len(columns))
+                else:
+                    conn.execute(
+                        "DELETE FROM sheet_columns WHERE sheet_url = ? AND idx >= ?",
+                        (self.sheet_url, len(columns)),
+                    )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sheet_columns (sheet_url, idx, cells) VALUES (?, ?, ?)",
+                    [(self.sheet_url, i, json.dumps(_trim(columns[i]), ensure_ascii=False)) for i in changed],
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO sheet_meta (sheet_url, n_rows, n_cols, synced_at, full_synced_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.sheet_url, n_rows, len(columns), now, full_synced_at),
+                )
+        finally:
+            conn.close()
+
+
+def _trim(col):
+    end = len(col)
+    while end and col[end - 1] == "":
+        end -= 1
+    return col[:end]
+
+
+def _pad(col, n):
+    return col + [""] * (n - len(col)) if len(col) < n else col
+
+
+def grid_to_columns(data):
+    width = max((len(r) for r in data), default=0)
+    return [[r[i] if i < len(r) else "" for r in data] for i in range(width)]
+
+
+def columns_to_grid(columns):
+    n_rows = max((len(c) for c in columns), default=0)
+    padded = [_pad(c, n_rows) for c in columns]
+    return [list(row) for row in zip(*padded)] if padded else []
+
+
+def dedup_headers(raw_headers):
+    # 重複的標題加上 _1、_2…
+    headers = []
+    seen_count = {}
+    for h in raw_headers:
+        if h in seen_count:
+            seen_count[h] += 1
+            headers.append(f"{h}_{seen_count[h]}")
+        else:
+            seen_count[h] = 0
+            headers.append(h)
+    return headers
+
+
+def build_dataframe(data):
+    # 標題去重並記下每列在試算表上的列號
+    raw_headers = [h.strip() for h in data[0]]
+    headers = dedup_headers(raw_headers)
+    df = pd.DataFrame(data[1:], columns=headers)
+    df['sheet_row'] = df.index + 2
+    return raw_headers, df
+
+
+def _col_range(start, end):
+    # 0-based [start, end) → "C:E"
+    from gspread.utils import rowcol_to_a1
+    first = rowcol_to_a1(1, start + 1).rstrip("0123456789")
+    last = rowcol_to_a1(1, end).rstrip("0123456789")
+    return f"{first}:{last}"
+
+
+def full_sync(worksheet, mirror):
+    data = worksheet.get_all_values()
+    columns = grid_to_columns(data)
+    if mirror is not None:
+        mirror.save(columns, full=True)
+    return data, {"mode": "full", "fetched_cols": len(columns)}
+
+
+def delta_sync(worksheet, mirror, dirty_cols=(), recent_cols=RECENT_COLS, full_interval=FULL_SYNC_INTERVAL):
+    cached, meta = mirror.load()
+    if not cached or time.time() - meta["full_synced_at"] > full_interval:
+        return full_sync(worksheet, mirror)
+
+    old_header = [c[0].strip() if c else "" for c in cached]
+    header = [h.strip() for h in worksheet.row_values(1)]
+    n_old = len(cached)
+    width = max(len(header), n_old)
+    header += [""] * (width - len(header))
+    if header[:n_old] != old_header:
+        return full_sync(worksheet, mirror)
+
+    fixed_idx = [header.index(h) for h in FIXED_HEADERS if h in header]
+    if not fixed_idx:
+        return full_sync(worksheet, mirror)
+    fixed_end = max(fixed_idx) + 1
+    tail_start = max(fixed_end, min(n_old, width) - recent_cols)
+    dirty = sorted({c for c in dirty_cols if fixed_end <= c < tail_start})
+
+    blocks = [(0, fixed_end)]
+    if tail_start < width:
+        blocks.append((tail_start, width))
+    blocks += [(c, c + 1) for c in dirty]
+    results = worksheet.batch_get([_col_range(s, e) for s, e in blocks], major_dimension="COLUMNS")
+
+    fetched = {}
+    for (start, end), values in zip(blocks, results):
+        for offset in range(end - start):
+            fetched[start + offset] = list(values[offset]) if offset < len(values) else []
+
+    # 既有列的固定欄必須一致，否則代表列被插入/刪除/重排，舊欄位的資料會錯位
+    n_rows_old = meta["n_rows"]
+    for i in range(fixed_end):
+        new_col = _pad(fetched[i], n_rows_old)
+        if len(_trim(fetched[i])) < len(_trim(cached[i])) or new_col[1:n_rows_old] != cached[i][1:n_rows_old]:
+            return full_sync(worksheet, mirror)
+
+    columns = cached + [[] for _ in range(width - n_old)]
+    for i, col in fetched.items():
+        columns[i] = col
+    n_rows = max(max((len(c) for c in fetched.values()), default=0), n_rows_old)
+    columns = [_pad(c, n_rows) for c in columns]
+    mirror.save(columns, changed=sorted(fetched))
+    return columns_to_grid(columns), {"mode": "delta", "fetched_cols": len(fetched)}
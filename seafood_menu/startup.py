@@ -0,0 +1,113 @@
+import importlib
+import json
+import logging
+import sys
+import threading
+import time
+
+# --- 啟動時間紀錄 ---
+# 冷啟動 (行程內第一次執行 app.py) 時記錄每個模組的匯入時間與首次繪製時間，
+# 之後的重跑不再重新計時。gspread / oauth2client 改為第一次連線試算表時才載入，
+# 透過 lazy_import 記在同一份報告裡，方便比較。
+#
+#   python -m seafood_menu.startup          # 在乾淨的行程中量測匯入時間
+#   python -m seafood_menu.startup --json   # 輸出 JSON，方便在 CI 追蹤冷啟動退化
+
+logger = logging.getLogger(__name__)
+
+# 依相依順序排列，讓每一項的時間盡量只包含該模組本身 (第三方套件先載入)
+THIRD_PARTY = ("numpy", "pandas", "PIL.Image", "streamlit")
+MODULES = (
+    "perf", "price_parser", "menu_layout", "font_assets", "render_assets", "menu_image", "image_cache",
+    "analytics", "sheet_mirror", "price_matrix", "sheet_cache", "publish", "price_check", "price_form", "ui",
+)
+
+_lock = threading.Lock()
+_report = {"imports": {}, "lazy_imports": {}, "marks": {}}
+_start = None
+
+
+def begin(start=None):
+    # app.py 最上方呼叫；只有行程內第一次有效
+    global _start
+    with _lock:
+        if _start is None:
+            _start = start if start is not None else time.perf_counter()
+
+
+def _timed_import(name):
+    already = name in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    return module, (0.0 if already else (time.perf_counter() - start) * 1000)
+
+
+def import_modules():
+    # 依序匯入並記錄各模組的匯入時間；已記錄過就直接返回
+    if _report["imports"]:
+        return _report["imports"]
+    imports = {}
+    for name in THIRD_PARTY + tuple(f"{__package__}.{m}" for m in MODULES):
+        if name not in sys.modules:  # streamlit run 時 streamlit 早已由伺服器載入
+            imports[name] = _timed_import(name)[1]
+    with _lock:
+        _report["imports"] = imports
+    return imports
+
+
+def lazy_import(name):
+    # 延遲載入重量級套件，第一次載入的時間記入報告
+    module, ms = _timed_import(name)
+    if ms:
+        with _lock:
+            _report["lazy_imports"][name] = ms
+    return module
+
+
+def mark(name):
+    # 記錄冷啟動時某個時間點 (距 begin 的毫秒數)；重跑時不覆寫
+    with _lock:
+        if _start is None or name in _report["marks"]:
+            return
+        _report["marks"][name] = (time.perf_counter() - _start) * 1000
+        if name == "ready":
+            logger.info("startup: %s", summary())
+
+
+def report():
+    with _lock:
+        return {
+            "imports": dict(_report["imports"]),
+            "lazy_imports": dict(_report["lazy_imports"]),
+            "marks": dict(_report["marks"]),
+        }
+
+
+def summary():
+    marks = _report["marks"]
+    total = sum(_report["imports"].values())
+    parts = [f"匯入 {total:.0f} ms"]
+    if "first_paint" in marks:
+        parts.append(f"首次繪製 {marks['first_paint']:.0f} ms")
+    if "ready" in marks:
+        parts.append(f"完成 {marks['ready']:.0f} ms")
+    return " · ".join(parts)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    begin()
+    import_modules()
+    mark("imported")
+    data = report()
+    if "--json" in argv:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+        return 0
+    for name, ms in sorted(data["imports"].items(), key=lambda kv: -kv[1]):
+        print(f"{ms:8.1f} ms  {name}")
+    print(f"{sum(data['imports'].values()):8.1f} ms  合計")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
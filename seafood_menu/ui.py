@@ -0,0 +1,477 @@
+import datetime
+import functools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from . import analytics
+from . import font_assets
+from . import image_cache
+from . import menu_image
+from . import menu_layout
+from . import perf
+from . import price_check
+from . import price_form
+from . import publish
+from . import sheet_cache
+from . import startup
+
+# --- Streamlit 介面 ---
+# app.py 只負責設定頁面並呼叫 main()；各區塊拆成函式，方便個別重用。
+
+
+# ====== 🔒 安全驗證區塊 ======
+def check_password():
+    if "app_password" in st.secrets:
+        correct_password = str(st.secrets["app_password"])
+    else:
+        return True
+
+    password_input = st.sidebar.text_input("🔒 管理員登入", type="password")
+    if password_input == correct_password:
+        return True
+    
+    st.sidebar.warning("請輸入密碼以解鎖")
+    st.title("🔒 系統鎖定中")
+    st.info("請在左側選單輸入管理員密碼以繼續。")
+    return False
+
+
+# --- 1. 發布與報價圖 ---
+def render_menu_files(plot_df, date_str, manual_upload, render_options):
+    # 在背景執行緒執行，不可呼叫 st.*；回傳 (檔案列表, 各階段耗時)，命中快取時耗時為空
+    cache_key = image_cache.make_key(plot_df, date_str, manual_upload, render_options)
+    files = image_cache.get(cache_key)
+    render_timings = {}
+    if files is None:
+        layout_options = menu_layout.LayoutOptions(columns=render_options["columns"], max_height=render_options["max_height"])
+        pages = menu_image.render_pages(plot_df, date_str, manual_upload=manual_upload,
+                                        options=layout_options, timings=render_timings)
+        files = menu_image.export_pages(pages, render_options["format"], render_options["quality"],
+                                        basename=f"menu_{date_str.replace('/','')}", timings=render_timings)
+        image_cache.put(cache_key, files)
+    return files, render_timings
+
+
+def show_publish_job(job):
+    plan = job.plan
+    if plan.is_new_date:
+        st.success(f"📅 建立新日期：{plan.date_str}")
+    else:
+        st.info(f"ℹ️ {plan.date_str} 資料已存在，執行覆蓋更新。")
+
+    futures = job.futures()
+    if not job.done():
+        finished = sum(f.done() for f in futures)
+        st.progress(finished / len(futures), text=f"發布中… ({finished}/{len(futures)})")
+
+    if job.write.done():
+        try:
+            result = job.write.result()
+            st.success(f"✅ 已成功更新 {plan.date_str} 的資料！")
+            st.caption(f"📤 寫入 {result.cells} 格 · {result.bytes_sent / 1024:.1f} KB · "
+                       f"{result.round_trips} 次請求 · {result.elapsed_ms:.0f} ms")
+        except Exception as e:
+            st.error(f"寫入失敗：{e}")
+    elif job.retry["attempt"]:
+        st.warning(f"⏳ 試算表忙碌中，背景重試第 {job.retry['attempt']} 次 ({job.retry['message']})")
+    else:
+        st.info("⏳ 正在寫入試算表…")
+
+    if job.render is None:
+        st.warning("⚠️ 提示：您尚未填寫任何售價，無法生成報價圖片。")
+        return
+    st.subheader("🖼️ 您的報價單")
+    missing = st.session_state.get("font_missing")
+    if missing:
+        st.warning(f"⚠️ 目前的字體缺少這些字，圖片上會顯示為方框：{missing}")
+    if not job.render.done():
+        st.info("🎨 報價圖產生中…")
+        return
+    try:
+        files, render_timings = job.render.result()
+    except Exception as e:
+        st.error(f"報價圖產生失敗：{e}")
+        return
+    for f in files:
+        if f.mime.startswith("image/"):
+            st.image(f.data, caption="長按可下載", use_column_width=True)
+        st.download_button(label=f"📥 下載 {f.name}", data=f.data, file_name=f.name, mime=f.mime, key=f"dl_{f.name}")
+    total_kb = sum(len(f.data) for f in files) / 1024
+    if render_timings:
+        st.caption(f"⏱️ {perf.format_timings(render_timings)} · 📦 {len(files)} 個檔案 {total_kb:,.0f} KB")
+    else:
+        st.caption(f"⚡ 內容與先前發布相同，直接使用快取檔案 · 📦 {len(files)} 個檔案 {total_kb:,.0f} KB")
+
+
+def trace_publish_job(job):
+    # 寫入與繪圖在背景執行緒進行，完成後第一次整頁重跑時記入這次的效能追蹤 (只記一次)
+    if job.traced or not job.done():
+        return
+    job.traced = True
+    if job.write.exception() is None:
+        result = job.write.result()
+        perf.add("write", result.elapsed_ms, count=result.round_trips)
+    if job.render is not None and job.render.exception() is None:
+        _, render_timings = job.render.result()
+        for name, ms in render_timings.items():
+            perf.add(f"render.{name}", ms)
+
+
+@st.fragment(run_every=1.0)
+def poll_publish_job(job):
+    # 發布進行中每秒只重跑這一區塊；全部完成後整頁重跑一次以停止輪詢
+    show_publish_job(job)
+    if job.done():
+        st.rerun()
+
+
+# --- 2. Streamlit 主程式 ---
+# 單頁最大高度 (寬 1600px 時)；LINE 長圖太長會被壓縮，Instagram 直式貼文比例 4:5
+PAGE_PRESETS = {"不分頁": None, "LINE (最高 4000px)": 4000, "Instagram (1600×2000)": 2000}
+
+
+def show_startup_report():
+    # 冷啟動時各模組的匯入時間與首次繪製時間，用來追蹤啟動變慢
+    report = startup.report()
+    with st.sidebar.expander("🚀 啟動時間", expanded=False):
+        st.caption(startup.summary())
+        rows = ([(name, ms, "") for name, ms in report["imports"].items()]
+                + [(name, ms, "延遲載入") for name, ms in report["lazy_imports"].items()])
+        if rows:
+            table = pd.DataFrame(rows, columns=["模組", "匯入 (ms)", "備註"]).sort_values("匯入 (ms)", ascending=False)
+            st.dataframe(table.set_index("模組").round(1))
+
+
+def asset_status():
+    # 顯示背景/浮水印狀態；沒有固定浮水印時提供臨時上傳，回傳上傳的檔案 (或 None)
+    if os.path.exists("bg_cny.png") or os.path.exists("bg_cny.jpg"):
+        st.caption("✅ 已啟用新年背景 (bg_cny)")
+    elif os.path.exists("bg_2026.png") or os.path.exists("bg_2026.jpg"):
+        st.caption("✅ 已啟用新年背景 (bg_2026)")
+    else:
+        st.caption("使用預設背景")
+
+    if os.path.exists("logo.png") or os.path.exists("logo.jpg"):
+        st.caption("✅ 已啟用固定浮水印 (顯示於標題正中間)")
+
+    if font_assets.find_font() is None:
+        st.caption("⚠️ 找不到中文字體，報價圖的中文會無法顯示 (可將字體放到 fonts/ 資料夾)")
+        if st.button("📥 下載中文字體 (約 16MB)"):
+            try:
+                with st.spinner('正在下載中文字體...'):
+                    font_assets.download()
+                st.rerun()
+            except Exception as e:
+                st.error(f"字體下載失敗：{e}")
+
+    uploaded_watermark = None
+    if not (os.path.exists("logo.png") or os.path.exists("logo.jpg")):
+        with st.expander("🎨 上傳臨時浮水印", expanded=False):
+            uploaded_watermark = st.file_uploader("上傳圖片", type=["png", "jpg"])
+    return uploaded_watermark
+
+
+REVIEW_COLUMNS = {
+    "item": "品項", "spec": "規格", "issue": "問題", "entered": "輸入值",
+    "reference": "參考值", "deviation_pct": "差異%", "history": "歷史次數",
+}
+
+
+def show_review(issues):
+    # 發布前檢查的結果；回傳是否按下「仍要發布」
+    st.subheader("🔎 發布前檢查")
+    st.warning(f"⚠️ 有 {len(issues)} 筆輸入值需要確認，尚未寫入試算表。請修改上方表單後重新發布，或確認無誤後直接發布。")
+    table = issues.assign(issue=issues["issue"].map(price_check.ISSUE_LABELS))
+    st.dataframe(table[list(REVIEW_COLUMNS)].rename(columns=REVIEW_COLUMNS), hide_index=True)
+    st.caption(f"參考值：差異過大為近 {price_check.HISTORY_WEEKS} 次的中位數，售價低於成本為本次成本。")
+    c1, c2 = st.columns(2)
+    with c1:
+        confirmed = st.button("✅ 確認無誤，仍要發布", key="review_confirm")
+    with c2:
+        if st.button("✏️ 取消，回去修改", key="review_cancel"):
+            st.session_state.pop("publish_review", None)
+            st.rerun()
+    return confirmed
+
+
+def start_publish(sheet, sheet_url, snapshot, date_str, render_options, uploaded_watermark, updates):
+    plan = publish.build_plan(snapshot, date_str, updates, sheet.col_count)
+    plot_data = [u for u in updates if u['price'].strip() != ""]
+    render_fn = None
+    if plot_data:
+        plot_df = pd.DataFrame(plot_data)
+        plot_df.rename(columns={'name':'品項名稱', 'spec':'規格', 'service':'代工資訊', 'price':'本週價格'}, inplace=True)
+        # 繪圖前先檢查字體涵蓋率，缺字在報價單區塊提示
+        st.session_state["font_missing"] = font_assets.missing_glyphs(menu_image.menu_text(plot_df, date_str))
+        render_fn = functools.partial(render_menu_files, plot_df, date_str, uploaded_watermark, render_options)
+
+    def refresh():
+        return publish.refresh_plan(sheet, plan, updates, width=len(snapshot.raw_headers))
+
+    def on_written(plan):
+        # 不論成功與否，試算表可能已改變 (新增欄位/標題)，讓下次重跑重新抓取
+        sheet_cache.invalidate(sheet_url, dirty_cols=[plan.price_col - 1, plan.cost_col - 1])
+        if plan.add_cols:
+            sheet_cache.reset_worksheet()
+
+    st.session_state["publish_job"] = publish.submit(sheet, plan, render_fn, on_written, refresh)
+
+
+def publish_tab(sheet, sheet_url, snapshot, uploaded_watermark):
+    col_date, col_info = st.columns([1, 2])
+    with col_date:
+        selected_date = st.date_input("選擇報價日期", datetime.date.today())
+        date_str = selected_date.strftime("%Y/%m/%d")
+    with col_info:
+        with st.expander("🖼️ 報價圖輸出設定", expanded=False):
+            o1, o2 = st.columns(2)
+            with o1:
+                layout_columns = st.slider("欄數", 1, 4, 2)
+                page_preset = st.selectbox("分頁", list(PAGE_PRESETS.keys()))
+            with o2:
+                export_format = st.selectbox("檔案格式", list(menu_image.EXPORT_FORMATS.keys()))
+                export_quality = st.slider("壓縮品質 (JPEG/WebP)", 50, 100, 90, disabled=export_format not in ("JPEG", "WebP"))
+    
+    with perf.span("form"):
+        entries = snapshot.derive("form_entries", lambda snap: price_form.build_entries(snap.matrix))
+        submitted, updates = price_form.take_submission(entries)
+        price_form.render_fragment(entries, date_str)
+    render_options = {
+        "columns": layout_columns,
+        "max_height": PAGE_PRESETS[page_preset],
+        "format": export_format,
+        "quality": export_quality,
+    }
+    publish_args = (sheet, sheet_url, snapshot, date_str, render_options, uploaded_watermark)
+
+    review = st.session_state.get("publish_review")
+    if review is not None and review["date_str"] != date_str:
+        st.session_state.pop("publish_review", None)
+        review = None
+    if submitted:
+        # 發布前先與歷史比對；有疑慮時先不寫入，等使用者確認或修改
+        with perf.span("check"):
+            issues = price_check.check_updates(price_check.get_stats(snapshot, date_str), updates)
+        if issues.empty:
+            st.session_state.pop("publish_review", None)
+            review = None
+            start_publish(*publish_args, updates)
+        else:
+            review = st.session_state["publish_review"] = {"date_str": date_str, "issues": issues}
+
+    if review is not None and show_review(review["issues"]):
+        # 確認時以表單目前的值重新檢查，確認後才改過的值若有新的問題要再確認一次
+        updates = price_form.collect_updates(entries)
+        with perf.span("check"):
+            issues = price_check.check_updates(price_check.get_stats(snapshot, date_str), updates)
+        if price_check.acknowledged(issues, review["issues"]):
+            st.session_state.pop("publish_review", None)
+            start_publish(*publish_args, updates)
+        else:
+            review["issues"] = issues
+            st.rerun()
+
+    job = st.session_state.get("publish_job")
+    if job is not None:
+        if job.done():
+            trace_publish_job(job)
+            show_publish_job(job)
+        else:
+            poll_publish_job(job)
+
+
+def dashboard_tab(snapshot):
+    matrix = snapshot.matrix
+    st.subheader("📈 營運主管看板")
+    
+    items = np.asarray(matrix.item, dtype=object)
+    all_items = pd.unique(items)
+    c_sel1, c_sel2 = st.columns(2)
+    with c_sel1: selected_item = st.selectbox("品項 (包含歷史停售)", all_items)
+    with c_sel2: selected_spec = st.selectbox("規格", pd.unique(np.asarray(matrix.spec, dtype=object)[items == selected_item])) if selected_item else None
+    
+    if selected_item and selected_spec:
+        chart_df = analytics.get_history(snapshot).for_item(selected_item, selected_spec)
+        if chart_df is not None:
+            only_cost_mode = st.checkbox("☐ 僅顯示成本趨勢 (排除售價干擾)")
+
+            if not chart_df.empty:
+                valid_prices = chart_df[chart_df['售價'] > 0]
+                last_valid_price = int(valid_prices.iloc[-1]['售價']) if not valid_prices.empty else 0
+
+                valid_costs = chart_df[chart_df['成本'] > 0]
+                if not valid_costs.empty:
+                    last_valid_cost = int(valid_costs.iloc[-1]['成本'])
+                    last_cost_date = valid_costs.iloc[-1]['日期']
+                else:
+                    last_valid_cost = 0
+                    last_cost_date = "無"
+
+                if last_valid_price > 0 and last_valid_cost > 0:
+                    est_profit = last_valid_price - last_valid_cost
+                    est_margin = round((est_profit / last_valid_price * 100), 1)
+                else:
+                    est_profit = 0
+                    est_margin = 0
+                
+                kpi1, kpi2, kpi3 = st.columns(3)
+                if only_cost_mode:
+                    kpi1.metric("最新售價", "---") 
+                    kpi2.metric("最新成本", f"${last_valid_cost}", help=f"資料來源日期: {last_cost_date}")
+                    kpi3.metric("最新毛利率", "---") 
+                else:
+                    kpi1.metric("最新售價", f"${last_valid_price}")
+                    kpi2.metric("最新成本", f"${last_valid_cost}", help=f"資料來源日期: {last_cost_date}")
+                    kpi3.metric("最新毛利率 (估)", f"{est_margin}%", 
+                                delta=f"{est_profit}元" if est_profit > 0 else "無利潤")
+                
+                st.markdown("---")
+                st.markdown("#### 📊 價格波動趨勢圖")
+                
+                if only_cost_mode:
+                    plot_df = chart_df[chart_df['成本'] > 0].set_index("日期")[["成本"]]
+                    st.line_chart(plot_df, color=["#8E7878"])
+                    st.caption("ℹ️ 目前為「僅看成本」模式，售價線已隱藏。")
+                else:
+                    line_chart_data = chart_df.set_index("日期")[["售價", "成本"]]
+                    st.line_chart(line_chart_data, color=["#A55B5B", "#8E7878"])
+
+                with st.expander("查看詳細數據表"):
+                     display_cols = ["日期", "原始售價(Text)", "單位", "原始成本(Text)", "售價", "成本", "毛利$", "毛利率%"]
+                     st.dataframe(chart_df[display_cols].set_index("日期"))
+            else:
+                st.warning("無數據")
+
+
+PORTFOLIO_COLUMNS = {
+    "item": "品項", "spec": "規格", "price": "最新售價", "cost": "最新成本", "margin": "毛利$",
+    "margin_pct": "毛利率%", "margin_change": "毛利率週變化", "cost_change_pct": "成本變動%",
+    "volatility_pct": "成本波動%", "price_date": "售價日期", "cost_date": "成本日期",
+}
+PORTFOLIO_SORTS = {
+    "毛利率 (低→高)": ("margin_pct", True),
+    "毛利率週變化 (跌最多)": ("margin_change", True),
+    "成本變動% (漲最多)": ("cost_change_pct", False),
+    "成本波動% (最不穩)": ("volatility_pct", False),
+    "毛利$ (高→低)": ("margin", False),
+}
+
+
+def portfolio_tab(snapshot):
+    st.subheader("💹 全品項毛利總覽")
+    portfolio = analytics.get_portfolio(snapshot)
+    latest = portfolio.attrs.get("latest_date", "")
+
+    squeeze = analytics.margin_squeeze(portfolio)
+    if not squeeze.empty:
+        lines = [f"- **{r.item} {r.spec}**：毛利率 {r.margin_pct_prev:.1f}% → {r.margin_pct_now:.1f}% "
+                 f"({r.margin_change:+.1f} 個百分點)" for r in squeeze.itertuples(index=False)]
+        st.warning(f"📉 {latest} 毛利縮水最多的品項\n" + "\n".join(lines))
+
+    active = portfolio[portfolio["active"] & ~portfolio["hidden"]]
+    k1, k2, k3 = st.columns(3)
+    k1.metric("本週有報價與成本", f"{len(active)} 個規格")
+    k2.metric("平均毛利率", f"{active['margin_pct'].mean():.1f}%" if not active.empty else "---")
+    k3.metric("毛利為負", f"{int((active['margin'] < 0).sum())} 個規格")
+
+    f1, f2, f3 = st.columns([2, 2, 1])
+    with f1:
+        keyword = st.text_input("🔍 搜尋品項", key="portfolio_search")
+    with f2:
+        sort_label = st.selectbox("排序", list(PORTFOLIO_SORTS), key="portfolio_sort")
+    with f3:
+        only_active = st.toggle("只看本週", value=True, key="portfolio_active")
+
+    view = active if only_active else portfolio[~portfolio["hidden"]]
+    if keyword.strip():
+        view = view[view["item"].astype(str).str.contains(keyword.strip(), case=False, regex=False)]
+    sort_col, ascending = PORTFOLIO_SORTS[sort_label]
+    view = view.sort_values(sort_col, ascending=ascending, na_position="last", kind="mergesort")
+    st.dataframe(view[list(PORTFOLIO_COLUMNS)].rename(columns=PORTFOLIO_COLUMNS), hide_index=True)
+    st.caption(f"成本波動% 為近 {analytics.VOLATILITY_WEEKS} 週成本的變異係數；成本變動% 比較最近兩次填寫的成本。點欄位標題也可排序。")
+
+
+PERF_HISTORY = 50  # 效能面板統計最近幾次重跑
+PERF_KEY = "perf_traces"
+PERF_COLUMNS = {"label": "階段", "last_ms": "本次 (ms)", "p50_ms": "p50", "p95_ms": "p95", "runs": "次數"}
+
+
+def perf_panel_enabled():
+    # 側邊欄開關，網址加上 ?perf=1 時預設開啟
+    return st.sidebar.toggle("⏱️ 效能面板", value=st.query_params.get("perf") == "1", key="perf_panel")
+
+
+def show_perf_panel(trace):
+    traces = st.session_state.setdefault(PERF_KEY, [])
+    traces.append(trace)
+    del traces[:-PERF_HISTORY]
+    with st.sidebar.expander("⏱️ 效能面板", expanded=True):
+        st.caption(f"本次重跑 {trace.spans['total']:.0f} ms · 統計最近 {len(traces)} 次重跑")
+        table = perf.summarize(traces, last=trace)
+        st.dataframe(table[list(PERF_COLUMNS)].rename(columns=PERF_COLUMNS).set_index("階段").round(1))
+        if trace.counts:
+            st.caption(" · ".join(f"{perf.label(k)} {v} 次請求" for k, v in trace.counts.items()))
+        st.caption("試算表授權/開啟與讀取只在快取失效時出現；報價圖與寫入在背景執行，記在發布完成後的那次重跑。")
+        st.download_button("📥 匯出追蹤 (JSON)", data=json.dumps([t.to_dict() for t in traces], ensure_ascii=False, indent=2),
+                           file_name="perf_traces.json", mime="application/json", key="perf_export")
+        if st.button("🧹 清除紀錄", key="perf_clear"):
+            traces.clear()
+
+
+def main():
+    if not check_password():
+        st.stop()
+
+    enabled = perf_panel_enabled()
+    with perf.trace(enabled) as trace:
+        render_app()
+    if enabled:
+        show_perf_panel(trace)
+
+
+def render_app():
+    st.title("🦀 海鮮報價營運系統")
+    startup.mark("first_paint")
+
+    try:
+        sheet_url = st.secrets["sheet_url"]
+        sheet = sheet_cache.get_worksheet(sheet_url)
+        snapshot = sheet_cache.load_snapshot(sheet_url)
+        # 每份快照一次：背景建立涵蓋所有品項的子集字體，發布時不必在繪圖中等待
+        snapshot.derive("font_prewarm", lambda snap: font_assets.prewarm(menu_image.catalog_text(snap.matrix)))
+
+        st.success("✅ 成功連線資料庫")
+        cache_stats = sheet_cache.get_stats()
+        st.sidebar.caption(
+            f"⚡ 資料快取：命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']} · "
+            f"本次 {cache_stats['last_ms']:.0f} ms · 上次抓取 {cache_stats['last_fetch_ms']:.0f} ms "
+            f"({cache_stats['source']}, {cache_stats['fetched_cols']} 欄)"
+        )
+        if st.sidebar.button("🔄 重新讀取試算表"):
+            sheet_cache.invalidate(sheet_url, full=True)
+            st.rerun()
+        show_startup_report()
+
+        uploaded_watermark = asset_status()
+
+        tab1, tab2, tab3 = st.tabs(["📝 報價與成本管理", "📊 營運數據分析", "💹 毛利總覽"])
+        with tab1:
+            publish_tab(sheet, sheet_url, snapshot, uploaded_watermark)
+        with tab2, perf.span("dashboard"):
+            dashboard_tab(snapshot)
+        with tab3, perf.span("portfolio"):
+            portfolio_tab(snapshot)
+
+        mem = snapshot.memory()
+        st.sidebar.caption(
+            f"🧠 快照記憶體 {mem['bytes'] / 1e6:.1f} MB (未精簡約 {mem['source_bytes'] / 1e6:.1f} MB) · "
+            f"衍生資料 {mem['derived_bytes'] / 1e6:.1f} MB · 保留原字串 {mem['raw_kept']:,} / {mem['cells']:,} 格"
+        )
+
+    except Exception as e:
+        st.error(f"錯誤：{e}")
+    startup.mark("ready")
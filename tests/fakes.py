@@ -0,0 +1,87 @@
+from gspread.utils import a1_to_rowcol
+
+
+def make_grid(items=3, specs=2, weeks=12):
+    header = ['品項名稱', '規格', '代工資訊']
+    for w in range(weeks):
+        d = f"2025/{w // 4 + 1:02d}/{w % 4 * 7 + 1:02d}"
+        header += [d, f"{d}_成本"]
+    grid = [header]
+    for i in range(items):
+        for s in range(specs):
+            row = [f"品項{i}", f"{s + 1}斤", "可代客料理" if s == 0 else ""]
+            for w in range(weeks):
+                row += [str(1000 + 10 * w + i), str(500 + w)]
+            grid.append(row)
+    return grid
+
+
+class FakeWorksheet:
+    # 只實作同步與發布用到的 gspread 介面
+    def __init__(self, grid):
+        self.grid = [list(r) for r in grid]
+        self.calls = []
+        self.fail = 0  # 接下來幾次讀取要拋出例外
+
+    def _maybe_fail(self, name):
+        self.calls.append(name)
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError(f"{name} failed")
+
+    def get_all_values(self):
+        self._maybe_fail("get_all_values")
+        return [list(r) for r in self.grid]
+
+    def row_values(self, row):
+        self._maybe_fail("row_values")
+        values = list(self.grid[row - 1])
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def batch_get(self, ranges, major_dimension="ROWS"):
+        self._maybe_fail("batch_get")
+        out = []
+        for rg in ranges:
+            first, last = rg.split(":")
+            if first.isdigit():
+                # 整列 (例如 "1:1")，以 COLUMNS 讀取時每欄一個單元素清單
+                row = list(self.grid[int(first) - 1])
+                while row and row[-1] == "":
+                    row.pop()
+                out.append([[v] for v in row])
+                continue
+            c0 = a1_to_rowcol(first + "1")[1] - 1
+            c1 = a1_to_rowcol(last + "1")[1]
+            cols = []
+            for c in range(c0, c1):
+                col = [r[c] if c < len(r) else "" for r in self.grid]
+                while col and col[-1] == "":
+                    col.pop()
+                cols.append(col)
+            while cols and not cols[-1]:
+                cols.pop()
+            out.append(cols)
+        return out
+
+
+class FakeResponse:
+    # 給 gspread.exceptions.APIError 用的最小 requests.Response
+    def __init__(self, status_code, body=None, text=""):
+        self.status_code = status_code
+        self._body = body
+        self.text = text
+
+    def json(self):
+        if self._body is None:
+            raise ValueError("not json")
+        return self._body
+
+
+def api_error(status_code, html=False):
+    from gspread.exceptions import APIError
+    if html:
+        return APIError(FakeResponse(status_code, text="<html>Bad Gateway</html>"))
+    body = {"error": {"code": status_code, "message": "error", "status": "ERROR"}}
+    return APIError(FakeResponse(status_code, body))
@@ -0,0 +1,95 @@
+import numpy as np
+
+from seafood_menu import analytics
+from seafood_menu.price_matrix import PriceMatrix
+
+DATES = ["2025/01/01", "2025/01/08", "2025/01/15"]
+
+
+def grid(rows, dates=DATES):
+    # rows：[(品項, 規格, [(售價, 成本), ...每個日期一組])]
+    header = ['品項名稱', '規格', '代工資訊']
+    for d in dates:
+        header += [d, f"{d}_成本"]
+    out = [header]
+    for item, spec, values in rows:
+        row = [item, spec, ""]
+        for price, cost in values:
+            row += [price, cost]
+        out.append(row)
+    return out
+
+
+def portfolio(rows, dates=DATES):
+    return analytics.build_portfolio(PriceMatrix.from_grid(grid(rows, dates)))
+
+
+def by_item(table, item):
+    return table[table["item"] == item].iloc[0]
+
+
+def test_squeeze_is_flagged_and_sorted_by_drop():
+    table = portfolio([
+        ("紅喉", "1斤", [("1000", "500"), ("1000", "500"), ("1000", "700")]),   # 50% → 30%
+        ("石斑", "1斤", [("1000", "500"), ("1000", "500"), ("1000", "600")]),   # 50% → 40%
+        ("龍蝦", "1斤", [("1000", "500"), ("1000", "500"), ("1000", "520")]),   # 50% → 48%
+    ])
+    assert table.attrs["latest_date"] == "2025/01/15"
+    row = by_item(table, "紅喉")
+    assert (row["margin_pct_now"], row["margin_pct_prev"], row["margin_change"]) == (30.0, 50.0, -20.0)
+    assert row["cost_change_pct"] == 40.0
+    squeezed = analytics.margin_squeeze(table)
+    assert list(squeezed["item"]) == ["紅喉", "石斑"]
+    assert list(analytics.margin_squeeze(table, top=1)["item"]) == ["紅喉"]
+
+
+def test_stale_row_is_not_active():
+    # 最後一次報價在上上週：仍列出最新值，但不算本週有效，也不列入警示
+    table = portfolio([
+        ("紅喉", "1斤", [("1000", "500"), ("1000", "900"), ("", "")]),
+        ("石斑", "1斤", [("1000", "500"), ("1000", "500"), ("1000", "500")]),
+    ])
+    row = by_item(table, "紅喉")
+    assert not row["active"]
+    assert (row["price_date"], row["price"], row["cost"]) == ("2025/01/08", 1000.0, 900.0)
+    assert analytics.margin_squeeze(table).empty
+
+
+def test_hidden_item_is_kept_but_not_flagged():
+    table = portfolio([("[停售]紅喉", "1斤", [("1000", "500"), ("1000", "500"), ("1000", "800")])])
+    row = table.iloc[0]
+    assert row["hidden"] and row["active"] and row["margin_change"] == -30.0
+    assert analytics.margin_squeeze(table).empty
+
+
+def test_missing_latest_cost_uses_previous_cost():
+    table = portfolio([("紅喉", "1斤", [("1000", "500"), ("1000", "600"), ("1100", "")])])
+    row = table.iloc[0]
+    assert (row["cost_date"], row["cost"], row["price"]) == ("2025/01/08", 600.0, 1100.0)
+    assert row["margin_pct"] == 45.5
+    assert not row["active"]  # 本週沒有成本
+    assert row["cost_change_pct"] == 20.0
+
+
+def test_rows_without_any_values_are_dropped():
+    table = portfolio([
+        ("紅喉", "1斤", [("1000", "500"), ("", ""), ("", "")]),
+        ("空白", "1斤", [("", ""), ("", ""), ("", "")]),
+    ])
+    assert list(table["item"]) == ["紅喉"]
+
+
+def test_sheet_without_dates():
+    table = portfolio([("紅喉", "1斤", [])], dates=[])
+    assert table.empty
+    assert table.attrs["latest_date"] == ""
+    assert analytics.margin_squeeze(table).empty
+
+
+def test_volatility_needs_two_costs():
+    table = portfolio([
+        ("紅喉", "1斤", [("", ""), ("", ""), ("1000", "500")]),
+        ("石斑", "1斤", [("1000", "400"), ("1000", "600"), ("1000", "500")]),
+    ])
+    assert np.isnan(by_item(table, "紅喉")["volatility_pct"])
+    assert by_item(table, "石斑")["volatility_pct"] == 16.3
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+from seafood_menu import font_assets
+
+
+def build_font(path, chars="紅喉石斑龍蝦"):
+    # 每個字都是一個方塊的最小 TrueType 字體
+    names = [".notdef"] + [f"g{ord(ch)}" for ch in chars]
+    pen = TTGlyphPen(None)
+    pen.moveTo((0, 0))
+    pen.lineTo((0, 500))
+    pen.lineTo((500, 500))
+    pen.lineTo((500, 0))
+    pen.closePath()
+    glyph = pen.glyph()
+    fb = FontBuilder(1000, isTTF=True)
+    fb.setupGlyphOrder(names)
+    fb.setupCharacterMap({ord(ch): f"g{ord(ch)}" for ch in chars})
+    fb.setupGlyf({name: glyph for name in names})
+    fb.setupHorizontalMetrics({name: (600, 0) for name in names})
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable({"familyName": "Test", "styleName": "Bold"})
+    fb.setupOS2()
+    fb.setupPost()
+    fb.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def font(tmp_path, monkeypatch):
+    monkeypatch.setattr(font_assets, "SUBSET_DIR", str(tmp_path / "subsets"))
+    return build_font(tmp_path / "test.ttf")
+
+
+def test_miss_returns_full_font_and_builds_in_background(font, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(font_assets, "prewarm", lambda text, path=None: scheduled.append(text))
+    assert font_assets.subset_for("紅喉石", font) == font
+    assert scheduled == ["紅喉石"]
+    assert not os.path.exists(font_assets.SUBSET_DIR)
+
+
+def test_prewarmed_subset_covers_later_renders(font, monkeypatch):
+    subset = font_assets.prewarm("紅喉石斑龍", font).result(timeout=30)
+    assert subset != font and os.path.exists(subset)
+    monkeypatch.setattr(font_assets, "prewarm", lambda text, path=None: pytest.fail("should not rebuild"))
+    # 文字較少時直接沿用涵蓋它的現成子集
+    assert font_assets.subset_for("紅喉", font) == subset
+    assert font_assets.subset_for("紅喉石斑龍", font) == subset
+
+
+def test_text_outside_subset_falls_back_to_full_font(font, monkeypatch):
+    font_assets.ensure_subset("紅喉", font)
+    scheduled = []
+    monkeypatch.setattr(font_assets, "prewarm", lambda text, path=None: scheduled.append(text))
+    assert font_assets.subset_for("紅喉蝦", font) == font
+    assert scheduled == ["紅喉蝦"]
+
+
+def test_prune_removes_character_lists_with_their_subset(font, monkeypatch):
+    monkeypatch.setattr(font_assets, "MAX_SUBSETS", 1)
+    first = font_assets.ensure_subset("紅", font)
+    os.utime(first, (1_000_000, 1_000_000))
+    second = font_assets.ensure_subset("蝦", font)
+    assert sorted(os.listdir(font_assets.SUBSET_DIR)) == sorted(
+        os.path.basename(p) for p in (second, font_assets._chars_path(second)))
@@ -0,0 +1,65 @@
+import os
+
+import pandas as pd
+import pytest
+
+from seafood_menu import image_cache
+from seafood_menu.menu_image import ExportFile
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_cache, "CACHE_DIR", str(tmp_path / "images"))
+    return tmp_path / "images"
+
+
+def plot_df(price="1200", cost="600"):
+    # 發布時的 plot_df 之外多帶一個成本欄，確認它不影響 key
+    return pd.DataFrame({'品項名稱': ["紅喉"], '規格': ["1斤"], '代工資訊': [""],
+                         '本週價格': [price], '本週成本': [cost]})
+
+
+def test_cost_only_change_keeps_the_key():
+    assert image_cache.make_key(plot_df(cost="600"), "2026/01/02") == image_cache.make_key(plot_df(cost="650"), "2026/01/02")
+
+
+def test_price_date_or_option_change_makes_a_new_key():
+    base = image_cache.make_key(plot_df(), "2026/01/02", render_options={"format": "png"})
+    assert image_cache.make_key(plot_df(price="1300"), "2026/01/02", render_options={"format": "png"}) != base
+    assert image_cache.make_key(plot_df(), "2026/01/09", render_options={"format": "png"}) != base
+    assert image_cache.make_key(plot_df(), "2026/01/02", render_options={"format": "pdf"}) != base
+
+
+def test_multi_file_round_trip():
+    files = [ExportFile("menu_1.png", "image/png", b"page-1"), ExportFile("menu_2.png", "image/png", b"page-2")]
+    assert image_cache.get("k") is None
+    image_cache.put("k", files)
+    assert image_cache.get("k") == files
+
+
+def test_corrupt_entry_is_a_miss(cache_dir):
+    image_cache.put("k", [ExportFile("menu.png", "image/png", b"x")])
+    os.remove(cache_dir / "k" / "0.bin")
+    assert image_cache.get("k") is None
+
+
+def put_aged(key, data, age):
+    image_cache.put(key, [ExportFile(f"{key}.png", "image/png", data)])
+    folder = os.path.join(image_cache.CACHE_DIR, key)
+    os.utime(folder, (1_000_000 + age, 1_000_000 + age))
+
+
+def test_prune_by_entry_count_keeps_most_recent(cache_dir):
+    for age, key in enumerate(["a", "b", "c"]):
+        put_aged(key, b"x", age)
+    image_cache.get("a")  # 讀取會更新最後使用時間
+    image_cache.prune(max_entries=2)
+    assert sorted(os.listdir(cache_dir)) == ["a", "c"]
+
+
+def test_prune_by_bytes(cache_dir):
+    for age, key in enumerate(["a", "b", "c"]):
+        put_aged(key, b"x" * 100, age)
+    # manifest 也計入大小，兩筆的總量必定超過 250 bytes，只留最新的一筆
+    image_cache.prune(max_bytes=250)
+    assert os.listdir(cache_dir) == ["c"]
@@ -0,0 +1,70 @@
+import pandas as pd
+
+from seafood_menu import menu_layout
+from seafood_menu.menu_layout import LayoutOptions, plan_layout
+
+
+def make_df(items, specs=2, service=""):
+    rows = []
+    for i in range(items):
+        for s in range(specs):
+            rows.append({'品項名稱': f"魚{i}", '規格': f"{s + 1}斤", '代工資訊': service if s == 0 else "", '本週價格': "1200"})
+    return pd.DataFrame(rows)
+
+
+def width_per_char(px):
+    # 假的量寬函式：每個字 px * 字體大小 / 50
+    return lambda text, role: len(text) * px * menu_layout.FONT_SIZES[role] / 50
+
+
+def test_single_page_without_limit():
+    plan = plan_layout(make_df(10), LayoutOptions(columns=2))
+    assert len(plan.pages) == 1
+    assert len(plan.pages[0].blocks) == 10
+    assert plan.scale == 1.0
+
+
+def test_blocks_go_to_shortest_column():
+    plan = plan_layout(make_df(4), LayoutOptions(columns=2))
+    xs = [b.x for b in plan.pages[0].blocks]
+    assert xs[0] == xs[2] != xs[1] == xs[3]
+
+
+def test_pages_respect_max_height():
+    options = LayoutOptions(columns=2, max_height=1200)
+    plan = plan_layout(make_df(30), options)
+    assert len(plan.pages) > 1
+    assert sum(len(p.blocks) for p in plan.pages) == 30
+    for page in plan.pages:
+        assert page.height <= options.max_height
+        for block in page.blocks:
+            assert block.y + block.height <= options.max_height - menu_layout.FOOTER_H
+
+
+def test_oversized_block_gets_its_own_page():
+    plan = plan_layout(make_df(2, specs=40), LayoutOptions(columns=1, max_height=1200))
+    assert [len(p.blocks) for p in plan.pages] == [1, 1]
+
+
+def test_narrow_columns_scale_text_to_fit():
+    measure = width_per_char(40)
+    wide = plan_layout(make_df(3), LayoutOptions(columns=1), measure)
+    narrow = plan_layout(make_df(3), LayoutOptions(columns=4), measure)
+    assert wide.scale == 1.0
+    assert narrow.scale < 1.0
+    col = narrow.options.col_width
+    for block in narrow.pages[0].blocks:
+        assert measure(f"● {block.name}", "title") * narrow.scale <= col
+        for spec, price in block.rows:
+            need = menu_layout.INDENT + measure(spec, "spec") + menu_layout.MIN_GAP + measure(price, "price")
+            assert need * narrow.scale <= col + 1e-6
+
+
+def test_long_service_note_wraps():
+    measure = width_per_char(40)
+    plan = plan_layout(make_df(1, service="可代客清肚去鱗切塊蒸煮另可真空包裝" * 2), LayoutOptions(columns=4), measure)
+    block = plan.pages[0].blocks[0]
+    assert len(block.notes) > 1
+    assert "".join(block.notes) == "▶ " + "可代客清肚去鱗切塊蒸煮另可真空包裝" * 2
+    for line in block.notes:
+        assert measure(line, "note") * plan.scale <= plan.options.col_width
@@ -0,0 +1,77 @@
+from seafood_menu import price_check
+from seafood_menu.price_matrix import PriceMatrix
+
+
+def history_grid(prices, costs):
+    header = ['品項名稱', '規格', '代工資訊']
+    row = ["紅喉", "1斤", ""]
+    for w, (p, c) in enumerate(zip(prices, costs)):
+        d = f"2025/{w // 4 + 1:02d}/{w % 4 * 7 + 1:02d}"
+        header += [d, f"{d}_成本"]
+        row += [p, c]
+    return [header, row]
+
+
+def check(price, cost, prices=("1200",) * 8, costs=("500",) * 8, date="2026/01/01"):
+    matrix = PriceMatrix.from_grid(history_grid(prices, costs))
+    stats = price_check.history_stats(matrix, before=date)
+    updates = [{'sheet_row': 2, 'name': "紅喉", 'spec': "1斤", 'service': "", 'price': price, 'cost': cost}]
+    return price_check.check_updates(stats, updates)
+
+
+def issues(price, cost, **kwargs):
+    return list(check(price, cost, **kwargs)["issue"])
+
+
+def test_normal_entry_passes():
+    assert issues("1250", "520") == []
+
+
+def test_price_typo_is_flagged():
+    table = check("12000", "500")
+    assert list(table["issue"]) == ["price_outlier"]
+    assert table["reference"].iat[0] == 1200
+    assert table["deviation_pct"].iat[0] == 900.0
+
+
+def test_cost_outlier_and_negative_margin():
+    assert issues("1200", "5000") == ["cost_outlier", "negative_margin"]
+
+
+def test_missing_cost_only_for_specs_with_cost_history():
+    assert issues("1200", "") == ["missing_cost"]
+    assert issues("1200", "", costs=("",) * 8) == []
+
+
+def test_sold_out_and_blank_prices_are_not_checked():
+    assert issues("售完", "") == []
+    assert issues("", "") == []
+
+
+def test_short_history_skips_outliers():
+    assert issues("12000", "500", prices=("1200", "1200"), costs=("500", "500")) == []
+
+
+def test_note_in_parentheses_is_not_a_range():
+    # "(3-4兩)" 不是價格：以 1200 比較，不應把 1250 當成異常
+    assert issues("1250", "500", prices=("$1200/斤(3-4兩)",) * 8) == []
+
+
+def test_history_excludes_the_date_being_overwritten():
+    # 覆蓋既有日期時，舊值不納入歷史
+    prices = ("1200",) * 7 + ("99999",)
+    stats = price_check.history_stats(PriceMatrix.from_grid(history_grid(prices, ("500",) * 8)),
+                                      before="2025/02/22")
+    assert stats.median["price"][0] == 1200
+
+
+def test_acknowledged():
+    reviewed = check("12000", "")
+    assert price_check.acknowledged(check("12000", ""), reviewed)
+    assert price_check.acknowledged(check("12000", "500"), reviewed)
+    assert not price_check.acknowledged(check("13000", ""), reviewed)
+
+
+def test_empty_updates():
+    stats = price_check.history_stats(PriceMatrix.from_grid(history_grid(("1200",), ("500",))))
+    assert price_check.check_updates(stats, []).empty
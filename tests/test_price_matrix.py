@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from seafood_menu import price_parser
+from seafood_menu.price_matrix import PriceMatrix
+
+from .fakes import make_grid
+
+MESSY = ["$1,200/斤", "800元", "1000-1200", "售完", "時價", "", " 900 ", "1200.50", "$1000-1200", "0"]
+
+
+def messy_grid():
+    grid = make_grid(items=4, specs=3, weeks=6)
+    for i, row in enumerate(grid[1:]):
+        for c in range(3, len(row)):
+            row[c] = MESSY[(i * 7 + c) % len(MESSY)]
+    grid[0].append("備註")
+    for i, row in enumerate(grid[1:]):
+        row.append("特價" if i % 2 else "")
+    return grid
+
+
+@pytest.mark.parametrize("grid", [make_grid(), messy_grid()], ids=["plain", "messy"])
+def test_to_grid_round_trip(grid):
+    assert PriceMatrix.from_grid(grid).to_grid() == grid
+
+
+def test_cell_matches_grid():
+    grid = messy_grid()
+    m = PriceMatrix.from_grid(grid)
+    for r, row in enumerate(grid, start=1):
+        for c, value in enumerate(row, start=1):
+            assert m.cell(r, c) == value
+    assert m.cell(len(grid) + 1, 1) == ""
+    assert m.cell(2, len(grid[0]) + 1) == ""
+
+
+def test_short_rows_are_padded():
+    grid = make_grid(items=1, specs=1, weeks=2)
+    grid.append(["新品", "1斤"])
+    m = PriceMatrix.from_grid(grid)
+    assert m.to_grid()[-1] == ["新品", "1斤"] + [""] * (len(grid[0]) - 2)
+
+
+def test_values_and_sold_out():
+    grid = messy_grid()
+    m = PriceMatrix.from_grid(grid)
+    j = 0
+    col = grid[0].index(m.dates[j])
+    for i, row in enumerate(grid[1:]):
+        raw = row[col]
+        if not raw.strip():
+            assert np.isnan(m.price[i, j])
+        else:
+            assert m.price[i, j] == np.float32(price_parser.clean_price(raw))
+        assert m.sold_out[i, j] == (raw == "售完")
+
+
+def test_only_lossy_strings_are_kept():
+    grid = make_grid(items=3, specs=2, weeks=4)
+    grid[1][3] = "$1,200/斤"
+    m = PriceMatrix.from_grid(grid)
+    assert m.memory()["raw_kept"] == 1
+
+
+def test_arrays_are_read_only():
+    m = PriceMatrix.from_grid(make_grid())
+    with pytest.raises(ValueError):
+        m.price[0, 0] = 1.0
+
+
+def test_dates_and_cost_columns():
+    grid = make_grid(weeks=3)
+    grid[0][-1] = ""  # 最後一個日期沒有成本欄 (空白標題不算日期)
+    m = PriceMatrix.from_grid(grid)
+    assert m.dates == [grid[0][3], grid[0][5], grid[0][7]]
+    assert list(m.cost_cols) == [4, 6, -1]
+    assert list(m.raw_column("cost", 2)) == [""] * m.n_rows
@@ -0,0 +1,72 @@
+import pytest
+
+from seafood_menu import price_parser
+from seafood_menu.price_parser import format_display, parse_price
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    price_parser._parse.cache_clear()
+
+
+@pytest.mark.parametrize("raw, value", [
+    ("$1,200/斤", 1200.0),
+    ("800元", 800.0),
+    ("900", 900.0),
+    ("1000-1200", 1200.0),
+    ("$1000-1200", 1000.0),       # 同舊版 clean_price：有 "$" 時取 "$" 後的數字
+    ("$1200/斤(3-4兩)", 1200.0),   # 括號裡的備註不是價格
+    ("800元/斤 (2~3隻)", 800.0),
+    ("2-3隻 $500", 500.0),
+    ("售完", 0.0),
+    ("時價", 0.0),
+    ("", 0.0),
+])
+def test_value_matches_clean_price(raw, value):
+    assert parse_price(raw).value == value
+    assert price_parser.clean_price(raw) == value
+
+
+@pytest.mark.parametrize("raw, low, high", [
+    ("1000-1200", 1000.0, 1200.0),
+    ("$1000~1200元/斤", 1000.0, 1200.0),
+    ("1200至1000", 1000.0, 1200.0),
+])
+def test_whole_value_range(raw, low, high):
+    parsed = parse_price(raw)
+    assert (parsed.min, parsed.max) == (low, high)
+
+
+@pytest.mark.parametrize("raw", ["$1200/斤(3-4兩)", "800元/斤 (2~3隻)", "2-3隻 $500"])
+def test_notes_are_not_ranges(raw):
+    parsed = parse_price(raw)
+    assert parsed.min == parsed.max == parsed.value
+
+
+def test_unit_and_flags():
+    parsed = parse_price("$1,200/斤")
+    assert parsed.unit == "斤" and parsed.has_currency and not parsed.sold_out
+    assert parse_price("800元/隻").unit == "隻"
+    assert parse_price("售完").sold_out
+
+
+def test_non_string():
+    assert parse_price(None).value == 0.0
+    assert price_parser.clean_price(float("nan")) == 0.0
+
+
+def test_price_values_matches_parse_price():
+    values = ["$1,200/斤", None, "800元", "售完", "800元"]
+    assert list(price_parser.price_values(values)) == [1200.0, 0.0, 800.0, 0.0, 800.0]
+
+
+@pytest.mark.parametrize("raw, shown", [
+    ("1200", "$1200"),
+    ("$1200", "$1200"),
+    ("售完", "售完"),
+    ("時價", "時價"),
+    ("", ""),
+    (None, ""),
+])
+def test_format_display(raw, shown):
+    assert format_display(raw) == shown
@@ -0,0 +1,209 @@
+import pytest
+from gspread.exceptions import APIError
+
+from seafood_menu import publish
+from seafood_menu.price_matrix import PriceMatrix
+from seafood_menu.sheet_cache import SheetSnapshot
+
+from .fakes import FakeWorksheet, api_error, make_grid
+
+
+def snapshot(grid):
+    return SheetSnapshot(PriceMatrix.from_grid(grid), fetched_at=0.0, fetch_ms=0.0)
+
+
+def updates_from(grid, price_col, cost_col):
+    return [{'sheet_row': r, 'name': row[0], 'spec': row[1], 'service': row[2],
+             'price': row[price_col - 1], 'cost': row[cost_col - 1]}
+            for r, row in enumerate(grid[1:], start=2)]
+
+
+def test_new_date_appends_two_columns_with_headers():
+    grid = make_grid(items=2, specs=1, weeks=2)
+    width = len(grid[0])
+    updates = [{'sheet_row': 2, 'name': "品項0", 'spec': "1斤", 'service': "", 'price': "1200", 'cost': "600"}]
+    plan = publish.build_plan(snapshot(grid), "2026/01/02", updates, col_count=width)
+    assert plan.is_new_date
+    assert (plan.price_col, plan.cost_col, plan.add_cols) == (width + 1, width + 2, 2)
+    assert (1, width + 1, "2026/01/02") in plan.cells
+    assert (1, width + 2, "2026/01/02_成本") in plan.cells
+    assert (2, width + 1, "1200") in plan.cells and (2, width + 2, "600") in plan.cells
+
+
+def test_new_date_needs_no_columns_when_sheet_is_wide_enough():
+    grid = make_grid(items=1, specs=1, weeks=2)
+    plan = publish.build_plan(snapshot(grid), "2026/01/02", [], col_count=len(grid[0]) + 5)
+    assert plan.add_cols == 0
+
+
+def test_existing_date_only_writes_changed_cells():
+    grid = make_grid(items=2, specs=2, weeks=3)
+    date = grid[0][5]
+    price_col, cost_col = 6, 7
+    updates = updates_from(grid, price_col, cost_col)
+    updates[1]['price'] = "1500"
+    updates[2]['cost'] = ""
+    plan = publish.build_plan(snapshot(grid), date, updates, col_count=len(grid[0]))
+    assert not plan.is_new_date
+    assert (plan.price_col, plan.cost_col) == (price_col, cost_col)
+    assert plan.cells == [(3, price_col, "1500"), (4, cost_col, "")]
+
+
+def test_unchanged_publish_is_empty():
+    grid = make_grid(items=2, specs=2, weeks=3)
+    plan = publish.build_plan(snapshot(grid), grid[0][3], updates_from(grid, 4, 5), col_count=len(grid[0]))
+    assert plan.cells == []
+    assert publish.build_requests(0, plan) == []
+
+
+class FakeSpreadsheet:
+    def __init__(self, col_count):
+        self.col_count = col_count
+
+    def fetch_sheet_metadata(self, params=None):
+        return {"sheets": [{"properties": {"sheetId": 0, "gridProperties": {"columnCount": self.col_count}}}]}
+
+
+def live_sheet(grid, col_count=None):
+    worksheet = FakeWorksheet(grid)
+    worksheet.id = 0
+    worksheet.col_count = len(grid[0])
+    worksheet.spreadsheet = FakeSpreadsheet(col_count or len(grid[0]))
+    return worksheet
+
+
+def test_refresh_does_not_overwrite_column_added_after_snapshot():
+    grid = make_grid(items=1, specs=1, weeks=2)
+    width = len(grid[0])
+    updates = [{'sheet_row': 2, 'name': "品項0", 'spec': "1斤", 'service': "", 'price': "1200", 'cost': "600"}]
+    plan = publish.build_plan(snapshot(grid), "2026/01/02", updates, col_count=width)
+    # 快照之後有人手動加了一欄「備註」
+    live = [row + [""] for row in grid]
+    live[0][-1] = "備註"
+    live[1][-1] = "今日特價"
+    worksheet = live_sheet(live, col_count=width + 1)
+    fresh = publish.refresh_plan(worksheet, plan, updates, width=width)
+    assert (fresh.price_col, fresh.cost_col, fresh.add_cols) == (width + 2, width + 3, 2)
+    assert all(col != width + 1 for _, col, _ in fresh.cells)
+    assert worksheet.calls.count("batch_get") == 2
+
+
+def test_refresh_uses_live_column_count():
+    grid = make_grid(items=1, specs=1, weeks=2)
+    width = len(grid[0])
+    plan = publish.build_plan(snapshot(grid), "2026/01/02", [], col_count=width)
+    assert plan.add_cols == 2
+    # 工作表右側已有空白欄 (別人加過欄)，不必再新增
+    fresh = publish.refresh_plan(live_sheet(grid, col_count=width + 4), plan, [], width=width)
+    assert fresh.add_cols == 0
+
+
+def test_refresh_writes_cells_changed_since_snapshot():
+    grid = make_grid(items=2, specs=1, weeks=2)
+    price_col, cost_col = 6, 7
+    updates = updates_from(grid, price_col, cost_col)
+    assert publish.build_plan(snapshot(grid), grid[0][5], updates, len(grid[0])).cells == []
+    # 快照之後有人改了第 2 列的售價；使用者的輸入要寫回去
+    live = [list(r) for r in grid]
+    live[1][price_col - 1] = "9999"
+    plan = publish.build_plan(snapshot(grid), grid[0][5], updates, len(grid[0]))
+    worksheet = live_sheet(live)
+    fresh = publish.refresh_plan(worksheet, plan, updates, width=len(grid[0]))
+    assert fresh.cells == [(2, price_col, grid[1][price_col - 1])]
+    assert worksheet.calls == ["batch_get"]
+
+
+def test_requests_merge_consecutive_rows_and_clear_empty_cells():
+    plan = publish.PublishPlan("2026/01/02", price_col=4, cost_col=5, is_new_date=True, add_cols=2,
+                               cells=[(2, 4, "100"), (3, 4, "200"), (5, 4, "300"), (2, 5, "")])
+    requests = publish.build_requests(7, plan)
+    assert requests[0] == {"appendDimension": {"sheetId": 7, "dimension": "COLUMNS", "length": 2}}
+    updates = [r["updateCells"] for r in requests[1:]]
+    starts = [(u["start"]["rowIndex"], u["start"]["columnIndex"], len(u["rows"])) for u in updates]
+    assert starts == [(1, 3, 2), (4, 3, 1), (1, 4, 1)]
+    assert updates[0]["rows"][1] == {"values": [{"userEnteredValue": {"stringValue": "200"}}]}
+    assert updates[2]["rows"] == [{"values": [{}]}]  # 空字串：不帶值 + fields 遮罩 = 清除
+    assert all(u["fields"] == "userEnteredValue" for u in updates)
+
+
+def test_date_header_is_written_as_a_date_like_user_entered():
+    plan = publish.PublishPlan("2026/01/02", price_col=4, cost_col=5, is_new_date=True,
+                               cells=[(1, 4, "2026/01/02"), (1, 5, "2026/01/02_成本"), (2, 4, "100")])
+    updates = [r["updateCells"] for r in publish.build_requests(0, plan)]
+    date_cell = updates[0]["rows"][0]["values"][0]
+    assert date_cell["userEnteredValue"] == {"numberValue": 46024}  # 2026/01/02 的試算表日期序號
+    assert date_cell["userEnteredFormat"]["numberFormat"]["pattern"] == "yyyy/mm/dd"
+    assert updates[1]["rows"][0]["values"][0] == {"userEnteredValue": {"stringValue": "2026/01/02_成本"}}
+    # 價格欄不可套到標題的格式遮罩
+    assert updates[2]["fields"] == "userEnteredValue"
+
+
+def test_status_prefers_http_status_over_gspread_code():
+    assert publish._status(api_error(429)) == 429
+    error = api_error(502, html=True)
+    assert error.code == -1
+    assert publish._status(error) == 502
+
+
+def flaky(*errors, result="ok"):
+    # 依序拋出 errors，之後回傳 result；calls 記錄呼叫次數
+    pending = list(errors)
+
+    def fn(*args):
+        fn.calls += 1
+        if pending:
+            raise pending.pop(0)
+        return result
+    fn.calls = 0
+    return fn
+
+
+def test_backoff_retries_rate_limit_and_server_errors():
+    retries = []
+    fn = flaky(api_error(429), api_error(503), api_error(502, html=True))
+    result = publish.with_backoff(fn, base_delay=0, on_retry=lambda *args: retries.append(args))
+    assert result == ("ok", 4)
+    assert [attempt for attempt, _, _ in retries] == [1, 2, 3]
+    assert publish._status(retries[0][2]) == 429
+
+
+def test_backoff_reraises_client_errors_immediately():
+    fn = flaky(api_error(400))
+    with pytest.raises(APIError):
+        publish.with_backoff(fn, base_delay=0)
+    assert fn.calls == 1
+
+
+def test_backoff_gives_up_after_max_retries():
+    fn = flaky(*[api_error(500) for _ in range(5)])
+    with pytest.raises(APIError):
+        publish.with_backoff(fn, max_retries=2, base_delay=0)
+    assert fn.calls == 3
+
+
+def test_submit_calls_on_written_when_the_write_fails():
+    grid = make_grid(items=1, specs=1, weeks=1)
+    worksheet = live_sheet(grid)
+    worksheet.spreadsheet.batch_update = flaky(api_error(400))
+    plan = publish.PublishPlan("2026/01/02", price_col=4, cost_col=5, is_new_date=False, cells=[(2, 4, "1")])
+    written = []
+    job = publish.submit(worksheet, plan, on_written=written.append)
+    with pytest.raises(APIError):
+        job.write.result(timeout=5)
+    assert written == [plan]
+
+
+def test_submit_writes_the_refreshed_plan():
+    grid = make_grid(items=1, specs=1, weeks=1)
+    worksheet = live_sheet(grid)
+    bodies = []
+    worksheet.spreadsheet.batch_update = bodies.append
+    stale = publish.PublishPlan("2026/01/02", price_col=4, cost_col=5, is_new_date=False)
+    fresh = publish.PublishPlan("2026/01/02", price_col=4, cost_col=5, is_new_date=False, cells=[(2, 4, "1")])
+    written = []
+    job = publish.submit(worksheet, stale, render_fn=lambda: "rendered", on_written=written.append,
+                         refresh=lambda: fresh)
+    result = job.write.result(timeout=5)
+    assert (result.cells, result.round_trips) == (1, 1)
+    assert job.render.result(timeout=5) == "rendered"
+    assert job.plan is fresh and written == [fresh] and len(bodies) == 1
@@ -0,0 +1,33 @@
+from PIL import Image
+
+from seafood_menu import render_assets
+
+
+def test_background_cache_is_bounded(tmp_path, monkeypatch):
+    path = str(tmp_path / "bg.png")
+    Image.new("RGB", (64, 64), "red").save(path)
+    monkeypatch.setattr(render_assets, "_backgrounds", render_assets.OrderedDict())
+    monkeypatch.setattr(render_assets, "_MAX_BACKGROUND_BYTES", 1600 * 3000 * 3)
+
+    for height in (1000, 1100, 1200, 1300):
+        img = render_assets.get_background(1600, height, path)
+        assert img.size == (1600, height)
+    assert len(render_assets._backgrounds) <= render_assets._MAX_BACKGROUNDS
+
+    # 超過大小上限的不快取，也不會把既有的擠掉
+    kept = list(render_assets._backgrounds)
+    assert render_assets.get_background(1600, 5000, path).size == (1600, 5000)
+    assert list(render_assets._backgrounds) == kept
+
+
+def test_background_copies_are_independent(tmp_path):
+    path = str(tmp_path / "bg.png")
+    Image.new("RGB", (8, 8), "red").save(path)
+    first = render_assets.get_background(100, 100, path)
+    first.paste((0, 0, 255), (0, 0, 100, 100))
+    assert render_assets.get_background(100, 100, path).getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_disabled_and_missing_background(tmp_path):
+    assert render_assets.get_background(100, 100, False) is None
+    assert render_assets.get_background(100, 100, str(tmp_path / "missing.png")) is None
@@ -0,0 +1,31 @@
+from seafood_menu import render_batch, sheet_mirror
+from seafood_menu.menu_image import ExportFile
+
+
+def duplicate_date_frame():
+    # 同一天有兩欄 (例如午市/晚市)，去重後為 2025/01/10 與 2025/01/10_1
+    grid = [['品項名稱', '規格', '代工資訊', '2025/01/10', '2025/01/10_成本', '2025/01/10', '2025/01/10_成本'],
+            ["紅喉", "1斤", "", "1200", "600", "1300", "600"]]
+    _, df = sheet_mirror.build_dataframe(grid)
+    return df
+
+
+def test_display_date_strips_dedup_suffix():
+    assert render_batch.display_date("2025/01/10_1") == "2025/01/10"
+    assert render_batch.display_date("2025/01/10") == "2025/01/10"
+
+
+def test_suffix_only_in_filename(tmp_path, monkeypatch):
+    df = duplicate_date_frame()
+    assert "2025/01/10_1" in df.columns
+    jobs = render_batch.build_jobs(df, ["2025/01/10", "2025/01/10_1"], [render_batch.Variant()], str(tmp_path))
+    assert [(j.date_label, j.date_str) for j in jobs] == [("2025/01/10", "2025/01/10"), ("2025/01/10_1", "2025/01/10")]
+
+    drawn = []
+    monkeypatch.setattr(render_batch.menu_image, "render_pages",
+                        lambda plot_df, date_str, **kwargs: drawn.append(date_str) or ["page"])
+    monkeypatch.setattr(render_batch.menu_image, "export_pages",
+                        lambda pages, fmt, quality, basename, timings: [ExportFile(f"{basename}.png", "image/png", b"x")])
+    _, _, paths, _ = render_batch.render_job(jobs[1])
+    assert drawn == ["2025/01/10"]
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["menu_20250110_1.png"]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from seafood_menu import analytics, price_check, sheet_cache, sheet_mirror
+from seafood_menu.price_matrix import PriceMatrix
+
+from .fakes import FakeWorksheet, make_grid
+
+URL = "https://example.com/sheet"
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    sheet = FakeWorksheet(make_grid(weeks=12))
+    mirror_path = str(tmp_path / "mirror.sqlite")
+    monkeypatch.setattr(sheet_cache, "get_worksheet", lambda url: sheet)
+    monkeypatch.setattr(sheet_cache, "get_mirror", lambda url: sheet_mirror.SheetMirror(mirror_path, url))
+    for name in ("_snapshots", "_dirty", "_generation"):
+        monkeypatch.setattr(sheet_cache, name, {})
+    for name in ("_force_full", "_reconciling", "_warm"):
+        monkeypatch.setattr(sheet_cache, name, set())
+    sheet_cache._warm.add(URL)  # 不走冷啟動的鏡像秒開 (背景執行緒)
+    return sheet
+
+
+def test_dirty_columns_survive_a_failed_sync(cache):
+    snap = sheet_cache.load_snapshot(URL, ttl=0)
+    assert snap.source == "full"
+
+    # 發布覆寫了一個比 RECENT_COLS 更早的日期欄
+    col = 3 + 2
+    cache.grid[1][col] = "9999"
+    sheet_cache.invalidate(URL, dirty_cols=[col])
+
+    cache.fail = 1
+    with pytest.raises(ConnectionError):
+        sheet_cache.load_snapshot(URL, ttl=0)
+    assert sheet_cache._dirty[URL] == {col}
+
+    snap = sheet_cache.load_snapshot(URL, ttl=0)
+    assert snap.source == "delta"
+    assert snap.cell(2, col + 1) == "9999"
+    assert URL not in sheet_cache._dirty
+
+
+def test_force_full_survives_a_failed_sync(cache):
+    sheet_cache.load_snapshot(URL, ttl=0)
+    sheet_cache.invalidate(URL, full=True)
+    cache.fail = 1
+    with pytest.raises(ConnectionError):
+        sheet_cache.load_snapshot(URL, ttl=0)
+    assert sheet_cache.load_snapshot(URL, ttl=0).source == "full"
+
+
+def test_memory_counts_every_kind_of_derived_value():
+    snap = sheet_cache.SheetSnapshot(PriceMatrix.from_grid(make_grid(weeks=4)), fetched_at=0.0, fetch_ms=0.0)
+    assert snap.memory()["derived_bytes"] == 0
+    sizes = {}
+    for name, build in (("history", lambda s: analytics.get_history(s)),
+                        ("stats", lambda s: price_check.get_stats(s, "2026/01/01")),
+                        ("portfolio", lambda s: analytics.get_portfolio(s)),
+                        ("array", lambda s: s.derive("array", lambda snap: np.zeros(100)))):
+        before = snap.memory()["derived_bytes"]
+        build(snap)
+        sizes[name] = snap.memory()["derived_bytes"] - before
+    assert all(size > 0 for size in sizes.values()), sizes
+    assert sizes["array"] == 800
@@ -0,0 +1,81 @@
+import pytest
+
+from seafood_menu import sheet_mirror
+
+from .fakes import FakeWorksheet, make_grid
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    return sheet_mirror.SheetMirror(str(tmp_path / "mirror.sqlite"), "url")
+
+
+def synced(mirror, grid):
+    sheet = FakeWorksheet(grid)
+    sheet_mirror.full_sync(sheet, mirror)
+    sheet.calls.clear()
+    return sheet
+
+
+def test_mirror_round_trip(mirror):
+    grid = make_grid()
+    synced(mirror, grid)
+    columns, meta = mirror.load()
+    assert sheet_mirror.columns_to_grid(columns) == grid
+    assert meta["n_rows"] == len(grid)
+
+
+def test_delta_fetches_fixed_recent_and_dirty_columns(mirror):
+    grid = make_grid(weeks=12)
+    sheet = synced(mirror, grid)
+    sheet.grid[1][-1] = "777"   # 最近的欄
+    sheet.grid[2][5] = "888"    # 早期的欄，只有標為 dirty 才會重抓
+    data, info = sheet_mirror.delta_sync(sheet, mirror, dirty_cols=[5])
+    assert info["mode"] == "delta"
+    assert "get_all_values" not in sheet.calls
+    assert data[1][-1] == "777" and data[2][5] == "888"
+    assert info["fetched_cols"] == 3 + sheet_mirror.RECENT_COLS + 1
+
+
+def test_delta_without_dirty_keeps_old_columns(mirror):
+    sheet = synced(mirror, make_grid(weeks=12))
+    sheet.grid[2][5] = "888"
+    data, _ = sheet_mirror.delta_sync(sheet, mirror)
+    assert data[2][5] != "888"
+
+
+def test_delta_picks_up_new_columns_and_rows(mirror):
+    sheet = synced(mirror, make_grid(weeks=12))
+    for row in sheet.grid:
+        row += ["", ""]
+    sheet.grid[0][-2:] = ["2026/01/02", "2026/01/02_成本"]
+    sheet.grid.append(["新品", "1斤", ""] + [""] * (len(sheet.grid[0]) - 5) + ["100", "50"])
+    data, info = sheet_mirror.delta_sync(sheet, mirror)
+    assert info["mode"] == "delta"
+    assert data == sheet.grid
+
+
+@pytest.mark.parametrize("change", ["header", "reorder", "delete_row"])
+def test_structure_changes_fall_back_to_full_sync(mirror, change):
+    sheet = synced(mirror, make_grid(weeks=12))
+    if change == "header":
+        sheet.grid[0][3] = "2024/12/31"
+    elif change == "reorder":
+        sheet.grid[1], sheet.grid[2] = sheet.grid[2], sheet.grid[1]
+    else:
+        del sheet.grid[1]
+    data, info = sheet_mirror.delta_sync(sheet, mirror)
+    assert info["mode"] == "full"
+    assert data == sheet.grid
+
+
+def test_stale_mirror_falls_back_to_full_sync(mirror):
+    sheet = synced(mirror, make_grid())
+    _, info = sheet_mirror.delta_sync(sheet, mirror, full_interval=0)
+    assert info["mode"] == "full"
+
+
+def test_empty_mirror_falls_back_to_full_sync(mirror):
+    sheet = FakeWorksheet(make_grid())
+    _, info = sheet_mirror.delta_sync(sheet, mirror)
+    assert info["mode"] == "full"